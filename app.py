@@ -1,29 +1,47 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_file
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, send_file
 import logging
 from dotenv import load_dotenv
 import os
 import tempfile
 from pathlib import Path
 import cv2
-import markdown
 import base64
 from io import BytesIO
-from zipfile import ZipFile
 from typing import List
 import re
 
+# Load environment variables before importing modules that read configuration
+load_dotenv()
+
 # Import processing functions
-from apps.routes.audio_processing import extract_audio
-from apps.routes.transcription_with_timestamps import transcribe_audio_with_timestamps
+from apps.routes.audio_processing import extract_audio_compact, probe_duration
+from apps.routes.transcription_backends import (
+    TRANSCRIPTION_BACKEND,
+    preload_transcription_backend,
+    transcription_cache_namespace,
+)
+from apps.routes.transcription_with_timestamps import (
+    CHUNK_SECONDS,
+    transcribe_audio_chunked,
+    transcribe_audio_with_timestamps,
+)
 from apps.routes.create_screenshots import create_automated_screenshots
-from apps.utils.document_generator import generate_document_from_transcript
+from apps.routes.media_ingest import MediaIngest
+from apps.utils.document_generator import generate_document_chunked
 from apps.utils.screenshot_selector import select_screenshot_moments
-from apps.utils.content_merger import generate_markdown_content
-from apps.utils.cloud_storage import CloudStorage
+from apps.utils.content_merger import generate_markdown_content, render_document_html, upload_screenshots
+from apps.utils.cloud_storage import IMMUTABLE_CACHE_CONTROL, LocalStorage, get_cloud_storage
 from apps.utils.github_analyzer import GitHubAnalyzer
-
-# Load environment variables
-load_dotenv()
+from apps.utils.transcription_cache import CACHE_PCM_KEYS, get_transcription_cache
+from apps.utils.lexical_scorer import get_prefilter_stats
+from apps.utils.markdown_renderer import get_markdown_renderer
+from apps.utils.transcript_timeline import TranscriptTimeline
+from apps.utils.transcript_store import get_transcript_store
+from apps.utils.pipeline import PipelineError, StageFailed, StagePipeline
+from apps.utils.readme_sections import build_section_block, join_section_blocks
+from apps.utils.result_store import get_result_store
+from apps.utils.zip_export import export_entries, stream_zip
+from apps.utils.upload_store import MAX_UPLOAD_MB, UploadError, get_upload_store
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -32,10 +50,20 @@ logger = logging.getLogger(__name__)
 # Create Flask app with custom template folder
 app = Flask(__name__, template_folder="apps/templates", static_folder="apps/static")
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev")
+app.jinja_env.globals["max_upload_mb"] = MAX_UPLOAD_MB
+# Let a fronting server (nginx/Apache) send local media files directly
+app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE") == "1"
 
 # Global variable to store processing results
 processing_results = {}
 
+# Load the local Whisper model (if configured) once per process; with
+# `gunicorn --preload` this happens before forking so workers share it.
+# Spawned screenshot decode workers re-import `python app.py` as
+# __mp_main__ and must not load a model of their own.
+if __name__ != "__mp_main__":
+    preload_transcription_backend()
+
 
 @app.route("/")
 def index():
@@ -59,6 +87,10 @@ def test_route():
         "ffmpeg": bool(os.system("ffmpeg -version") == 0),
         "opencv": bool(cv2.__version__),
         "temp_dir": os.access(tempfile.gettempdir(), os.W_OK),
+        "transcription_backend": TRANSCRIPTION_BACKEND,
+        "transcription_cache": get_transcription_cache().stats(),
+        "segment_prefilter": get_prefilter_stats(),
+        "markdown_render_cache": get_markdown_renderer().stats(),
     }
     return jsonify(tests)
 
@@ -82,8 +114,9 @@ def process_video():
             "screenshot_count": 0
         }
         
-        # Process video only if it's uploaded
-        if "video" in request.files and request.files["video"].filename:
+        # Process video only if it's uploaded (directly or via the chunked upload API)
+        has_video_file = "video" in request.files and request.files["video"].filename
+        if has_video_file or request.form.get("upload_id"):
             video_markdown = process_video_content(request)
             if not video_markdown["success"]:
                 return render_template(
@@ -128,7 +161,21 @@ def process_video():
 def process_video_content(request) -> dict:
     """Process video and generate markdown content."""
     logger.debug("Starting video processing")
-    
+
+    # Videos sent through the chunked upload API are already on disk
+    upload_id = request.form.get("upload_id")
+    if upload_id:
+        store = get_upload_store()
+        try:
+            upload = store.claim(upload_id)
+        except UploadError as e:
+            return {"success": False, "error": str(e)}
+        try:
+            return process_video_file(store.path(upload_id), upload["sha256"])
+        finally:
+            # The upload is only needed for this request
+            store.remove(upload_id)
+
     # Initial validation
     if "video" not in request.files:
         return {
@@ -155,66 +202,199 @@ def process_video_content(request) -> dict:
             "error": "Video file too large (max 25MB)"
         }
 
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = Path(temp_dir) / "uploaded_video.mp4"
+        video.save(video_path)
+        return process_video_file(video_path)
+
+def process_video_file(video_path: Path, upload_digest: str = None) -> dict:
+    """Transcribe, screenshot and document a video file on disk."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        ingest = start_media_ingest(video_path, work_dir)
+        try:
+            return _process_ingested_video(video_path, upload_digest, ingest)
+        finally:
+            if ingest:
+                ingest.close()
+
+def start_media_ingest(video_path: Path, work_dir: str):
+    """Start the audio and frame decodes, or return None if they cannot start."""
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir_path = Path(temp_dir)
-            video_path = temp_dir_path / "uploaded_video.mp4"
-            video.save(video_path)
-
-            # Extract audio with compression for large files
-            audio_path = temp_dir_path / "audio.wav"
-            extract_audio(str(video_path), str(audio_path), max_size_mb=25)
-
-            # Get transcription with timestamps
-            transcription = transcribe_audio_with_timestamps(str(audio_path))
-
-            if not transcription["success"]:
-                return {
-                    "success": False,
-                    "error": f"Transcription failed: {transcription['error']}"
-                }
+        return MediaIngest(str(video_path), work_dir, hash_pcm=CACHE_PCM_KEYS).start()
+    except Exception as e:
+        logger.warning(f"Media ingest unavailable, decoding separately: {str(e)}")
+        return None
 
-            # Get screenshots based on content analysis
-            screenshot_suggestions = select_screenshot_moments(transcription["words"])
-            screenshots = []
+def _process_ingested_video(video_path: Path, upload_digest: str, ingest) -> dict:
+    pipeline = build_video_pipeline(video_path, upload_digest, ingest)
+    try:
+        results = pipeline.run()
+    except PipelineError as e:
+        if isinstance(e.error, StageFailed):
+            return {"success": False, "error": str(e.error)}
+        logger.error(f"Error during video processing in stage {e.stage}", exc_info=e.error)
+        return {
+            "success": False,
+            "error": f"Processing error: {str(e.error)}"
+        }
 
-            if screenshot_suggestions["success"] and screenshot_suggestions.get("timestamps"):
-                screenshots = create_automated_screenshots(
-                    str(video_path),
-                    screenshot_suggestions["timestamps"]
-                )
+    screenshots = results["screenshots"]
+    markdown_result = results["markdown"]
+    return {
+        "success": True,
+        "markdown_content": markdown_result["raw"],
+        "markdown_html": markdown_result["html"],
+        "screenshots": screenshots,
+        "has_screenshots": len(screenshots) > 0,
+        "screenshot_count": len(screenshots),
+        "transcript_id": results["transcript_id"],
+        "image_urls": [
+            {
+                "timestamp": timestamp,
+                "url": url,
+                "thumbnail": results["uploads"]["image_sets"].get(timestamp, {}).get("thumbnail"),
+                # Kept in the result manifest so a regenerated or edited
+                # video section is previewed with the same derivatives
+                "image_set": results["uploads"]["image_sets"].get(timestamp)
+            }
+            for timestamp, url in sorted(results["uploads"]["image_urls"].items())
+            if url
+        ],
+        "upload_failures": results["uploads"]["failures"],
+        "stage_timings": pipeline.timings
+    }
 
-            # Generate document content with actual timestamps
-            full_transcript = " ".join([word["word"] for word in transcription["words"]])
-            doc_result = generate_document_from_transcript(
-                full_transcript,
-                timestamps=[s["timestamp"] for s in screenshots]
+def build_video_pipeline(video_path: Path, upload_digest: str = None, ingest: MediaIngest = None) -> StagePipeline:
+    """
+    Declare the video processing stages and their dependencies.
+
+    Transcription only waits for the media ingest's audio job, so the frame
+    decode overlaps it; screenshots use the frame index only if that decode
+    has finished by the time moments are selected and never wait for it.
+    Screenshot capture, encoding and upload overlap document generation, so
+    the critical path is audio extraction, transcription, moment selection
+    and document generation.
+    """
+    def transcribe():
+        # Get transcription with timestamps (served from cache for repeat uploads)
+        transcription = transcribe_video(video_path, upload_digest, ingest)
+        if not transcription["success"]:
+            raise StageFailed(f"Transcription failed: {transcription['error']}")
+        return TranscriptTimeline.from_words(transcription["words"])
+
+    def transcript_id(timeline):
+        # Keep the transcript searchable after this request
+        return get_transcript_store().save(timeline)
+
+    def moments(timeline):
+        # Get screenshot moments based on content analysis
+        suggestions = select_screenshot_moments(timeline)
+        if not suggestions["success"]:
+            return []
+        timestamps = suggestions.get("timestamps") or []
+        if ingest and ingest.duration:
+            timestamps = [t for t in timestamps if t <= ingest.duration]
+        return timestamps
+
+    def screenshots(moments):
+        if not moments:
+            return []
+        frame_index = None
+        if ingest:
+            # The index only refines timestamps, so it must not hold up capture
+            frame_index = ingest.frame_index(wait=False)
+            if frame_index is None:
+                logger.info("Frame index not ready; capturing screenshots at the selected timestamps")
+                ingest.stop_frames()
+        return create_automated_screenshots(str(video_path), moments, frame_index=frame_index)
+
+    def uploads(screenshots):
+        if not screenshots:
+            return {"image_urls": {}, "image_sets": {}, "failures": []}
+        try:
+            return upload_screenshots(screenshots)
+        except Exception as e:
+            logger.error(f"Screenshot upload failed: {str(e)}")
+            return {"image_urls": {}, "image_sets": {}, "failures": [{"error": str(e)}]}
+
+    def document(timeline, moments):
+        # Generate document content at the selected timestamps; long
+        # transcripts are drafted in chunks and merged
+        doc_result = generate_document_chunked(timeline, timestamps=moments)
+        if not doc_result["success"]:
+            raise StageFailed(
+                f"Document generation failed: {doc_result.get('error', 'Unknown error')}"
             )
+        return doc_result["document_content"]
 
-            if not doc_result["success"]:
-                return {
-                    "success": False,
-                    "error": f"Document generation failed: {doc_result.get('error', 'Unknown error')}"
-                }
-
-            # Generate markdown content
-            markdown_result = generate_markdown_content(doc_result["document_content"], screenshots)
-
-            return {
-                "success": True,
-                "markdown_content": markdown_result["raw"],
-                "markdown_html": markdown_result["html"],
-                "screenshots": screenshots,
-                "has_screenshots": len(screenshots) > 0,
-                "screenshot_count": len(screenshots)
-            }
+    def markdown(document, screenshots, uploads):
+        return generate_markdown_content(
+            document, screenshots, image_urls=uploads["image_urls"], image_sets=uploads["image_sets"]
+        )
 
-    except Exception as e:
-        logger.exception("Error during video processing")
-        return {
-            "success": False,
-            "error": f"Processing error: {str(e)}"
-        }
+    return (
+        StagePipeline()
+        .add("timeline", transcribe)
+        .add("transcript_id", transcript_id, deps=["timeline"])
+        .add("moments", moments, deps=["timeline"])
+        .add("screenshots", screenshots, deps=["moments"])
+        .add("uploads", uploads, deps=["screenshots"])
+        .add("document", document, deps=["timeline", "moments"])
+        .add("markdown", markdown, deps=["document", "screenshots", "uploads"])
+    )
+
+def transcribe_video(video_path: Path, upload_digest: str = None, ingest: MediaIngest = None) -> dict:
+    """
+    Transcribe a video's audio, reusing cached results for identical content.
+
+    The upload-hash lookup needs no decode. With a started MediaIngest, the
+    PCM key is hashed by its audio job and, on a miss, its compressed audio
+    is transcribed, so the audio is decoded once and neither waits for the
+    frame decode.
+    """
+    cache = get_transcription_cache()
+
+    # Transcripts from a different backend or model are never reused
+    namespace = transcription_cache_namespace()
+
+    # Fast path: byte-identical re-upload, no decode needed. Chunked uploads
+    # were hashed while streaming, so they skip re-reading the file.
+    fingerprint = f"upload-{upload_digest}" if upload_digest else cache.file_fingerprint(video_path)
+    cache_keys = [f"{namespace}-{fingerprint}"]
+
+    def candidate_keys():
+        yield cache_keys[0]
+        if CACHE_PCM_KEYS:
+            # Same audio in a re-encoded or re-muxed container; only decoded
+            # here when there is no ingest to take it from
+            pcm_fingerprint = ingest.pcm_fingerprint() if ingest else cache.pcm_fingerprint(video_path)
+            if pcm_fingerprint:
+                cache_keys.append(f"{namespace}-{pcm_fingerprint}")
+                yield cache_keys[1]
+
+    hit_key, words = cache.get_any(candidate_keys())
+    if words is not None:
+        if hit_key != cache_keys[0]:
+            cache.put(cache_keys[:1], words)
+        return {"success": True, "words": words, "cached": True}
+
+    audio_path = ingest.audio_path() if ingest else None
+    duration = ingest.duration if ingest else probe_duration(str(video_path))
+
+    if duration > CHUNK_SECONDS:
+        # Long recordings are split at silences and transcribed concurrently
+        transcription = transcribe_audio_chunked(audio_path or str(video_path))
+    elif audio_path:
+        transcription = transcribe_audio_with_timestamps(audio_path)
+    else:
+        # Extract audio in one pass to a compressed codec sized for the API limit,
+        # streamed into memory rather than a temp file
+        audio_file = extract_audio_compact(str(video_path), max_size_mb=25)
+        transcription = transcribe_audio_with_timestamps(audio_file)
+
+    if transcription["success"]:
+        cache.put(cache_keys, transcription["words"])
+    return transcription
 
 def process_github_content(repo_url: str, sections: List[str]) -> dict:
     """Generate README sections from GitHub repository."""
@@ -230,12 +410,14 @@ def process_github_content(repo_url: str, sections: List[str]) -> dict:
         
         analyzer = GitHubAnalyzer(repo_url)
         sections_content = []
+        section_names = []
         
         for section in sections:
             logger.debug(f"Generating section: {section}")
             result = analyzer.generate_section(section)
             if result["success"]:
                 sections_content.append(result["content"])
+                section_names.append(section)
             else:
                 logger.error(f"Failed to generate section {section}: {result.get('error')}")
         
@@ -247,7 +429,9 @@ def process_github_content(repo_url: str, sections: List[str]) -> dict:
         
         return {
             "success": True,
-            "sections": sections_content
+            "sections": sections_content,
+            "section_names": section_names,
+            "repo_url": repo_url
         }
     except Exception as e:
         logger.exception("Error processing GitHub content")
@@ -268,41 +452,60 @@ def process_github_content(repo_url: str, sections: List[str]) -> dict:
         }
 
 def combine_markdown_sections(video_content: dict, github_content: dict) -> dict:
-    """Combine video markdown with GitHub sections."""
+    """
+    Combine video markdown with GitHub sections.
+
+    Each section is rendered as its own block (served from the render
+    cache when unchanged) and the document is joined from the fragments,
+    so a single section can later be regenerated or re-rendered alone.
+    """
     try:
         if not github_content.get("success", False):
             return github_content
         
-        # Start with video content if it exists
-        combined_markdown = ""
+        blocks = []
+        
+        # Start with video content if it exists. Its preview keeps the HTML
+        # rendered with the responsive screenshot derivatives; the markdown
+        # only links the full-size images.
         if video_content.get("markdown_content"):
-            combined_markdown = video_content["markdown_content"] + "\n\n"
+            blocks.append(build_section_block(
+                "video", "video", video_content["markdown_content"],
+                {"transcript_id": video_content.get("transcript_id"),
+                 "image_urls": video_content.get("image_urls", [])},
+                html=video_content.get("markdown_html")
+            ))
         
         # Add GitHub sections
-        for section in github_content.get("sections", []):
-            combined_markdown += section + "\n\n"
+        repo_url = github_content.get("repo_url")
+        sections = github_content.get("sections", [])
+        names = github_content.get("section_names") or [f"section_{n}" for n in range(len(sections))]
+        for name, section in zip(names, sections):
+            blocks.append(build_section_block(
+                name, "github", section, {"repo_url": repo_url, "section": name}
+            ))
         
-        # Use more markdown extensions for better rendering
-        markdown_html = markdown.markdown(
+        combined_markdown, markdown_html = join_section_blocks(blocks)
+        
+        # Images are already uploaded; downloads are served from this manifest
+        result_id = get_result_store().save(
             combined_markdown,
-            extensions=[
-                'markdown.extensions.extra',
-                'markdown.extensions.codehilite',
-                'markdown.extensions.tables',
-                'markdown.extensions.toc',
-                'markdown.extensions.fenced_code',
-                'markdown.extensions.sane_lists'
-            ],
-            output_format='html5'
+            image_urls=video_content.get("image_urls", []),
+            transcript_id=video_content.get("transcript_id"),
+            repo_url=repo_url,
+            sections=blocks
         )
         
         return {
             "success": True,
+            "result_id": result_id,
             "markdown_content": combined_markdown,
             "markdown_html": markdown_html,
-            "screenshots": video_content.get("screenshots", []),
+            "sections": blocks,
+            "image_urls": video_content.get("image_urls", []),
             "has_screenshots": video_content.get("has_screenshots", False),
-            "screenshot_count": video_content.get("screenshot_count", 0)
+            "screenshot_count": video_content.get("screenshot_count", 0),
+            "transcript_id": video_content.get("transcript_id")
         }
     except Exception as e:
         logger.exception("Error combining markdown sections")
@@ -311,20 +514,54 @@ def combine_markdown_sections(video_content: dict, github_content: dict) -> dict
             "error": f"Error combining sections: {str(e)}"
         }
 
+def regenerate_section(manifest: dict, block: dict) -> dict:
+    """Generate fresh markdown for one section of a stored result."""
+    if block["kind"] == "github":
+        result = GitHubAnalyzer(manifest["repo_url"]).generate_section(block["name"])
+        if not result["success"]:
+            return result
+        return {"success": True, "markdown": result["content"]}
+
+    # Video: redraft from the stored transcript with the already uploaded images
+    transcript_id = manifest.get("transcript_id")
+    index = get_transcript_store().get_index(transcript_id) if transcript_id else None
+    if index is None:
+        return {"success": False, "error": "Transcript is no longer available"}
+
+    images = manifest.get("image_urls", [])
+    image_urls = {image["timestamp"]: image["url"] for image in images}
+    image_sets = {image["timestamp"]: image["image_set"] for image in images if image.get("image_set")}
+    doc_result = generate_document_chunked(index.timeline, timestamps=sorted(image_urls))
+    if not doc_result["success"]:
+        return doc_result
+
+    markdown_result = generate_markdown_content(
+        doc_result["document_content"],
+        [{"timestamp": timestamp} for timestamp in image_urls],
+        image_urls=image_urls,
+        image_sets=image_sets
+    )
+    if not markdown_result["success"]:
+        return markdown_result
+    # The preview fragment keeps the responsive images the markdown lacks
+    return {"success": True, "markdown": markdown_result["raw"], "html": markdown_result["html"]}
+
 
 @app.route("/download_markdown", methods=["POST"])
 def download_markdown():
+    """Serve the markdown of a stored result; images are already uploaded."""
     try:
-        data = request.get_json()
-        markdown_content = data.get("markdown_content")
-        screenshots = data.get("screenshots", [])
-        
-        # Generate markdown with cloud URLs
-        markdown_result = generate_markdown_content(markdown_content, screenshots)
+        data = request.get_json(silent=True) or {}
+        try:
+            result = get_result_store().get(data.get("result_id"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if result is None:
+            return jsonify({"error": "Result not found"}), 404
         
         # Return just the markdown file
         return send_file(
-            BytesIO(markdown_result["raw"].encode('utf-8')),
+            BytesIO(result["markdown_content"].encode('utf-8')),
             mimetype='text/markdown',
             as_attachment=True,
             download_name='blog_post.md'
@@ -335,11 +572,221 @@ def download_markdown():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/results/<result_id>/export.zip", methods=["GET"])
+def export_result(result_id):
+    """
+    Stream a ZIP of the README and its images.
+
+    Entries are compressed and sent one at a time as they are read from
+    storage, so the archive is never held in memory and the download starts
+    with the first image. Image links point at the bundled copies.
+    """
+    try:
+        result = get_result_store().get(result_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if result is None:
+        return jsonify({"error": "Result not found"}), 404
+
+    entries = export_entries(result["markdown_content"], get_cloud_storage())
+    return Response(
+        stream_zip(entries),
+        mimetype="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="readme_export.zip"'}
+    )
+
+
+@app.route("/results/<result_id>/sections/<int:index>", methods=["POST"])
+def update_result_section(result_id, index):
+    """
+    Regenerate or re-render one section of a stored result.
+
+    JSON body: {"action": "regenerate"} asks the model for a new version of
+    the section; {"action": "render", "markdown": "..."} replaces it with
+    edited markdown. Only that section is generated and rendered; the
+    document is re-joined from the cached fragments.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get("action", "regenerate")
+    store = get_result_store()
+
+    try:
+        manifest = store.get(result_id)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if manifest is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+
+    blocks = manifest.get("sections", [])
+    if not 0 <= index < len(blocks):
+        return jsonify({"success": False, "error": "Section not found"}), 404
+    block = blocks[index]
+
+    html = None
+    if action == "render":
+        if not isinstance(data.get("markdown"), str):
+            return jsonify({"success": False, "error": "markdown is required"}), 400
+        source = data["markdown"]
+        if block["kind"] == "video":
+            html = render_document_html(source, {
+                image["url"]: image["image_set"]
+                for image in manifest.get("image_urls", []) if image.get("image_set")
+            })
+    elif action == "regenerate":
+        try:
+            result = regenerate_section(manifest, block)
+        except Exception as e:
+            logger.exception("Error regenerating section")
+            return jsonify({"success": False, "error": str(e)}), 500
+        if not result["success"]:
+            return jsonify({"success": False, "error": result.get("error", "Unknown error")}), 502
+        source = result["markdown"]
+        html = result.get("html")
+    else:
+        return jsonify({"success": False, "error": f"Unknown action: {action}"}), 400
+
+    if block["kind"] == "github":
+        inputs = {"repo_url": manifest.get("repo_url"), "section": block["name"]}
+    else:
+        inputs = {"transcript_id": manifest.get("transcript_id"), "image_urls": manifest.get("image_urls", [])}
+    if action == "render":
+        inputs["edited"] = True
+    # Built outside the lock; only this section is swapped into the
+    # current manifest, so concurrent edits of other sections survive
+    new_block = build_section_block(block["name"], block["kind"], source, inputs, html=html)
+    manifest = store.replace_section(result_id, index, new_block)
+    if manifest is None:
+        return jsonify({"success": False, "error": "Result not found"}), 404
+
+    markdown_content, markdown_html = join_section_blocks(manifest["sections"])
+
+    return jsonify({
+        "success": True,
+        "section": new_block,
+        "markdown_content": markdown_content,
+        "markdown_html": markdown_html
+    })
+
+
+@app.route("/uploads", methods=["POST"])
+def create_upload():
+    """Start a chunked, resumable video upload."""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = get_upload_store().create(data.get("filename", "video"), data.get("size"))
+    except UploadError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, **upload}), 201
+
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    """Report how many bytes of an upload have been received."""
+    try:
+        upload = get_upload_store().status(upload_id)
+    except UploadError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if upload is None:
+        return jsonify({"success": False, "error": "Upload not found"}), 404
+    return jsonify({"success": True, **upload})
+
+
+@app.route("/uploads/<upload_id>", methods=["PATCH"])
+def append_upload(upload_id):
+    """Stream the request body onto the upload at the Upload-Offset header."""
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset is None:
+        return jsonify({"success": False, "error": "Upload-Offset header is required"}), 400
+
+    try:
+        upload = get_upload_store().append(upload_id, request.stream, offset)
+    except UploadError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, **upload})
+
+
+@app.route("/uploads/<upload_id>/complete", methods=["POST"])
+def complete_upload(upload_id):
+    """Finish an upload; its id can then be passed to /process_video."""
+    try:
+        upload = get_upload_store().complete(upload_id)
+    except UploadError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, **upload})
+
+
+@app.route("/transcript/search", methods=["GET"])
+def transcript_search():
+    """Search a processed video's transcript by word, phrase or prefix."""
+    transcript_id = request.args.get("id", "")
+    query = request.args.get("q", "").strip()
+    mode = request.args.get("mode", "phrase")
+
+    if not query:
+        return jsonify({"success": False, "error": "Query parameter 'q' is required"}), 400
+
+    try:
+        start_ms = request.args.get("start_ms", type=int)
+        end_ms = request.args.get("end_ms", type=int)
+        context_words = request.args.get("context", 5, type=int)
+        limit = request.args.get("limit", 100, type=int)
+
+        hits = get_transcript_store().search(
+            transcript_id,
+            query,
+            mode=mode,
+            start_ms=start_ms,
+            end_ms=end_ms,
+            context_words=context_words,
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    if hits is None:
+        return jsonify({"success": False, "error": "Transcript not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "transcript_id": transcript_id,
+        "query": query,
+        "mode": mode,
+        "count": len(hits),
+        "hits": hits
+    })
+
+
+@app.route("/media/<path:file_key>", methods=["GET"])
+def media(file_key):
+    """
+    Serve an image from the local storage backend.
+
+    Keys are content hashes, so the file name doubles as a strong ETag and
+    responses are cacheable forever. send_file answers If-None-Match with
+    304 and streams the file through the server's file wrapper (sendfile).
+    """
+    storage = get_cloud_storage()
+    if not isinstance(storage, LocalStorage):
+        return jsonify({"error": "Media is not served locally"}), 404
+
+    try:
+        path = storage.path_for(file_key)
+    except ValueError:
+        return jsonify({"error": "Invalid media path"}), 400
+    if not path.is_file():
+        return jsonify({"error": "Not found"}), 404
+
+    response = send_file(path, etag=path.stem, conditional=True)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
 @app.route("/test_s3", methods=["GET"])
 def test_s3():
     try:
         logger.info("Starting S3 connection test")
-        cloud_storage = CloudStorage()
+        cloud_storage = get_cloud_storage()
+        cloud_storage.check_bucket()
         
         # Test uploading a simple image
         test_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
@@ -383,7 +830,8 @@ def test_s3_detailed():
         }
         
         # Initialize client
-        cloud_storage = CloudStorage()
+        cloud_storage = get_cloud_storage()
+        cloud_storage.check_bucket()
         
         # Test image (1x1 pixel transparent PNG)
         test_image = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
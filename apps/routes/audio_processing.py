@@ -1,7 +1,28 @@
 from moviepy.editor import VideoFileClip
+from io import BytesIO
+from pathlib import Path
 import subprocess
 import os
 
+# Compressed codecs accepted by the Whisper API, with bitrate ladders (kbps)
+# tried from best to smallest until the encoded audio fits the byte budget.
+AUDIO_CODECS = {
+    "opus": {
+        "args": ["-c:a", "libopus", "-application", "voip"],
+        "format": "ogg",
+        "extension": ".ogg",
+        "bitrates": [32, 24, 16, 12, 8, 6],
+    },
+    "mp3": {
+        "args": ["-c:a", "libmp3lame"],
+        "format": "mp3",
+        "extension": ".mp3",
+        "bitrates": [64, 48, 32, 24, 16, 8],
+    },
+}
+DEFAULT_AUDIO_CODEC = os.getenv("AUDIO_CODEC", "opus")
+CONTAINER_OVERHEAD = 1.05  # Headroom for container framing
+
 
 def extract_audio(video_path, output_audio_path="audio.wav", max_size_mb=25):
     """
@@ -28,31 +49,162 @@ def extract_audio(video_path, output_audio_path="audio.wav", max_size_mb=25):
             capture_output=True,
         )
 
-        # Check if further compression needed
+        # PCM ignores bitrate settings, so re-encode oversized audio with a
+        # compressed codec (which needs its own file extension)
         if os.path.getsize(output_audio_path) > max_size_mb * 1024 * 1024:
-            temp_path = output_audio_path + ".temp"
-            os.rename(output_audio_path, temp_path)
-
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-i",
-                    temp_path,
-                    "-ar",
-                    "16000",
-                    "-ac",
-                    "1",
-                    "-b:a",
-                    "32k",  # Very aggressive compression
-                    "-y",
-                    output_audio_path,
-                ],
-                check=True,
-                capture_output=True,
-            )
+            os.remove(output_audio_path)
+            return extract_audio_compact(video_path, output_audio_path, max_size_mb)
+
+        return output_audio_path
+
+    except Exception as e:
+        raise Exception(f"Error extracting audio: {str(e)}")
+
+
+
+def probe_duration(media_path: str) -> float:
+    """
+    Return the duration of a media file in seconds using ffprobe.
+
+    Streamed recordings (e.g. browser MediaRecorder WebM) often carry no
+    duration in their header; ffprobe then reports N/A and the duration is
+    measured by remuxing the file instead.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            media_path,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return measure_duration(media_path)
+
+
+def measure_duration(media_path: str) -> float:
+    """
+    Measure a media file's duration by stream-copying it to a null output.
+
+    Packets are read but not decoded, so this is cheap even for long files.
+    Returns 0.0 if no timestamp could be read.
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-nostdin",
+            "-i",
+            media_path,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-f",
+            "null",
+            "-progress",
+            "pipe:1",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    out_time_us = [
+        line.split("=", 1)[1] for line in result.stdout.splitlines() if line.startswith("out_time_us=")
+    ]
+    try:
+        return max(0, int(out_time_us[-1])) / 1_000_000
+    except (IndexError, ValueError):
+        return 0.0
 
-            os.remove(temp_path)
 
+def choose_audio_encoding(duration: float, max_size_mb: float = 25, codec: str = DEFAULT_AUDIO_CODEC) -> dict:
+    """
+    Pick the highest bitrate of a codec whose output fits within max_size_mb.
+
+    Args:
+        duration (float): Audio duration in seconds, or 0 if unknown
+        max_size_mb (float): Byte budget for the encoded audio in MB
+        codec (str): Key into AUDIO_CODECS
+
+    Returns:
+        dict: codec, bitrate in kbps, ffmpeg args, container format and extension
+    """
+    if codec not in AUDIO_CODECS:
+        raise ValueError(f"Unsupported audio codec: {codec}")
+
+    settings = AUDIO_CODECS[codec]
+    budget_bytes = max_size_mb * 1024 * 1024
+
+    # Unknown duration: the smallest rung is the best chance of fitting
+    bitrates = settings["bitrates"] if duration > 0 else settings["bitrates"][-1:]
+    for bitrate in bitrates:
+        estimated_size = duration * bitrate * 1000 / 8 * CONTAINER_OVERHEAD
+        if estimated_size <= budget_bytes:
+            return {
+                "codec": codec,
+                "bitrate_kbps": bitrate,
+                "args": settings["args"] + ["-b:a", f"{bitrate}k"],
+                "format": settings["format"],
+                "extension": settings["extension"],
+            }
+
+    raise ValueError(
+        f"Audio of {duration:.0f}s cannot fit in {max_size_mb}MB with {codec}"
+    )
+
+
+def extract_audio_compact(video_path, output_audio_path=None, max_size_mb=25, codec=DEFAULT_AUDIO_CODEC):
+    """
+    Extract audio in a single ffmpeg pass straight to a compressed codec.
+
+    The bitrate is chosen from the probed duration so the result fits the
+    byte budget without a second encode. If output_audio_path is None the
+    audio is streamed through a pipe into memory instead of a temp file.
+
+    Returns:
+        str | BytesIO: Path of the written file (its extension matches the
+        codec), or an in-memory buffer whose ``name`` carries the extension
+    """
+    try:
+        encoding = choose_audio_encoding(probe_duration(video_path), max_size_mb, codec)
+
+        command = [
+            "ffmpeg",
+            "-i",
+            video_path,
+            "-vn",  # No video
+            "-ar",
+            "16000",  # 16kHz sample rate
+            "-ac",
+            "1",  # Mono
+            *encoding["args"],
+            "-f",
+            encoding["format"],
+        ]
+
+        if output_audio_path is None:
+            result = subprocess.run(
+                command + ["pipe:1"], check=True, capture_output=True
+            )
+            buffer = BytesIO(result.stdout)
+            buffer.name = f"audio{encoding['extension']}"
+            return buffer
+
+        output_audio_path = str(Path(output_audio_path).with_suffix(encoding["extension"]))
+        subprocess.run(
+            command + ["-y", output_audio_path], check=True, capture_output=True
+        )
         return output_audio_path
 
     except Exception as e:
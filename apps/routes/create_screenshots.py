@@ -1,17 +1,35 @@
 import cv2
-import base64
 import json
 import logging
+import multiprocessing
 import re
+import subprocess
+import threading
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from pathlib import Path
 import numpy as np
 import os
+from apps.utils.frame_encoder import DEFAULT_PRESET, ENCODE_WORKERS, MAX_SCREENSHOT_SIZE, encode_frame, submit_frame
+from apps.utils.transcript_index import TranscriptIndex
+
+# Targets closer than this are reached by decoding forward instead of seeking
+SEEK_THRESHOLD_FRAMES = 120
+
+# Videos at least this long are decoded by several worker processes
+PARALLEL_DECODE_MIN_SECONDS = float(os.getenv("PARALLEL_DECODE_MIN_SECONDS", 600))
+# Per web worker, alongside the shared encoder pool, so kept small by default
+DECODE_WORKERS = int(os.getenv("SCREENSHOT_DECODE_WORKERS", min(4, os.cpu_count() or 1)))
+# Upper bound on one encoded frame written to shared memory
+MAX_ENCODED_FRAME_BYTES = MAX_SCREENSHOT_SIZE * MAX_SCREENSHOT_SIZE * 3 + 65536
 
 logger = logging.getLogger(__name__)
 
 
 def create_screenshots_for_keyword(
-    video_path: str, transcription_path: str, keyword: str
+    video_path: str, transcription_path: str, keyword: str, preset: str = DEFAULT_PRESET
 ) -> dict:
     """
     Create screenshots from a video at timestamps when a specific keyword is spoken.
@@ -19,95 +37,107 @@ def create_screenshots_for_keyword(
     Args:
         video_path (str): Path to the video file
         transcription_path (str): Path to the transcription JSON file with timestamps
-        keyword (str): Keyword to search for in the transcription
+        keyword (str): Keyword (or phrase) to search for in the transcription
+        preset (str): Encoding preset from apps.utils.frame_encoder.ENCODE_PRESETS
 
     Returns:
         dict: Dictionary containing the screenshots and their timestamps
     """
-    try:
-        # Read the transcription file
-        with open(transcription_path, "r") as f:
-            transcription = json.load(f)
-
-        # Open the video
-        video = cv2.VideoCapture(video_path)
-        if not video.isOpened():
-            return {"success": False, "error": "Could not open video file"}
-
-        # Get video properties
-        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = video.get(cv2.CAP_PROP_FPS)
-        duration = total_frames / fps
+    result = create_screenshots_for_keywords(video_path, transcription_path, [keyword], preset=preset)
+    if not result["success"]:
+        return {"success": False, "error": result["error"], "screenshots": []}
 
-        logger.debug(
-            f"Video duration: {duration}s, FPS: {fps}, Total frames: {total_frames}"
-        )
-
-        # Create regex pattern for strict word boundary matching
-        pattern = r"\b" + re.escape(keyword) + r"\b"
-        regex = re.compile(pattern, re.IGNORECASE)
-
-        # Find all instances of the keyword using regex
-        keyword_instances = [
-            word for word in transcription if regex.search(word["word"])
-        ]
+    keyword_result = result["keywords"][keyword]
+    if not keyword_result["occurrences"]:
+        return {
+            "success": False,
+            "error": f"Keyword '{keyword}' not found in transcription",
+            "screenshots": [],
+        }
 
-        if not keyword_instances:
-            return {
-                "success": False,
-                "error": f"Keyword '{keyword}' not found in transcription",
-                "screenshots": [],
-            }
+    return {
+        "success": True,
+        "keyword": keyword,
+        "screenshots": keyword_result["screenshots"],
+        "total_matches": len(keyword_result["screenshots"]),
+        "video_duration": result["video_duration"],
+    }
+
+
+def create_screenshots_for_keywords(
+    video_path: str,
+    transcription_path: str,
+    keywords: list,
+    tolerance: float = 0.5,
+    preset: str = DEFAULT_PRESET,
+) -> dict:
+    """
+    Capture screenshots for many keywords with one transcript scan and one video pass.
 
-        screenshots = []
+    Hits for all keywords are merged, timestamps within ``tolerance`` seconds
+    of each other share a single frame, and every frame is decoded in one
+    forward pass over the video.
 
-        for instance in keyword_instances:
-            timestamp = float(instance["start"])
+    Args:
+        video_path (str): Path to the video file
+        transcription_path (str): Path to the transcription JSON file with timestamps
+        keywords (list): Keywords or phrases to search for
+        tolerance (float): Seconds within which hits reuse the same frame
+        preset (str): Encoding preset from apps.utils.frame_encoder.ENCODE_PRESETS
 
-            # Check if timestamp is within video bounds
-            if timestamp > duration:
-                logger.warning(
-                    f"Timestamp {timestamp}s exceeds video duration {duration}s"
-                )
+    Returns:
+        dict: Per-keyword screenshots under "keywords", plus the unique frames
+    """
+    try:
+        with open(transcription_path, "r") as f:
+            index = TranscriptIndex.from_words(json.load(f))
+        timeline = index.timeline
+
+        # Collect every hit across all keywords
+        hits = []
+        for keyword in keywords:
+            for first, last in index.search(keyword):
+                hits.append((float(timeline.start[first]), keyword, timeline.text(first, last)))
+
+        # Merge hits that fall within the tolerance onto one frame time
+        frame_times = []
+        hit_frames = []
+        for timestamp, keyword, context in sorted(hits):
+            if not frame_times or timestamp - frame_times[-1] > tolerance:
+                frame_times.append(timestamp)
+            hit_frames.append((frame_times[-1], timestamp, keyword, context))
+
+        video, fps, duration = _open_video(video_path)
+        if video is None:
+            return {"success": False, "error": "Could not open video file", "screenshots": []}
+
+        try:
+            frames = _capture_frames(video, fps, duration, frame_times, preset)
+        finally:
+            video.release()
+
+        keyword_results = {
+            keyword: {"occurrences": 0, "screenshots": []} for keyword in keywords
+        }
+        for frame_time, timestamp, keyword, context in hit_frames:
+            keyword_results[keyword]["occurrences"] += 1
+            encoded = frames.get(frame_time)
+            if encoded is None:
                 continue
-
-            # Calculate frame number
-            frame_number = int(timestamp * fps)
-
-            # Set video to the frame
-            video.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-
-            # Read the frame
-            success, frame = video.read()
-            if success:
-                # Resize frame if too large (optional)
-                max_size = 800
-                height, width = frame.shape[:2]
-                if width > max_size or height > max_size:
-                    scale = max_size / max(width, height)
-                    frame = cv2.resize(frame, None, fx=scale, fy=scale)
-
-                # Convert frame to jpg
-                _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                base64_image = base64.b64encode(buffer).decode("utf-8")
-
-                screenshots.append(
-                    {
-                        "timestamp": timestamp,
-                        "word_context": instance["word"],
-                        "image_base64": base64_image,
-                    }
-                )
-            else:
-                logger.error(f"Failed to read frame at timestamp {timestamp}s")
-
-        video.release()
+            keyword_results[keyword]["screenshots"].append({
+                "timestamp": timestamp,
+                "frame_timestamp": frame_time,
+                "word_context": context,
+                **encoded,
+            })
 
         return {
             "success": True,
-            "keyword": keyword,
-            "screenshots": screenshots,
-            "total_matches": len(screenshots),
+            "keywords": keyword_results,
+            "screenshots": [
+                {"timestamp": frame_time, **encoded} for frame_time, encoded in sorted(frames.items())
+            ],
+            "total_frames": len(frames),
             "video_duration": duration,
         }
 
@@ -116,79 +146,311 @@ def create_screenshots_for_keyword(
         return {"success": False, "error": str(e), "screenshots": []}
 
 
-def create_automated_screenshots(video_path: str, timestamps: list) -> list:
-    """Create screenshots from a video at specified timestamps."""
+def create_automated_screenshots(
+    video_path: str, timestamps: list, preset: str = DEFAULT_PRESET, frame_index=None, parallel: bool = None
+) -> list:
+    """
+    Create screenshots from a video at specified timestamps.
+
+    Frames are decoded in one forward pass on the calling thread and
+    resized/encoded on the shared encoder pool, so decoding the next frame
+    overlaps with encoding the last. Each screenshot carries its encoded
+    image as ``image_bytes``; convert with ``screenshots_to_base64`` where a
+    template needs base64.
+
+    If a FrameIndex from media ingest is given, each timestamp is first moved
+    to the stillest nearby frame (recorded as ``frame_timestamp``), so only
+    the final full-resolution frames are decoded here.
+
+    Long videos (``parallel=None`` and at least PARALLEL_DECODE_MIN_SECONDS)
+    are decoded in keyframe-aligned ranges by worker processes instead.
+    """
     try:
         logger.debug(f"Opening video file: {video_path}")
         if not os.path.exists(video_path):
             logger.error(f"Video file not found: {video_path}")
             return []
 
-        video = cv2.VideoCapture(str(video_path))
-        if not video.isOpened():
+        video, fps, duration = _open_video(video_path)
+        if video is None:
             logger.error("Failed to open video file with OpenCV")
             return []
 
-        # Get video properties
-        fps = video.get(cv2.CAP_PROP_FPS)
-        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps
+        frame_times = {timestamp: timestamp for timestamp in timestamps}
+        if frame_index is not None and len(frame_index):
+            frame_times = {
+                timestamp: frame_index.stable_timestamp(timestamp) for timestamp in timestamps
+            }
+
+        if parallel is None:
+            parallel = duration >= PARALLEL_DECODE_MIN_SECONDS
+        workers = min(DECODE_WORKERS, len(set(frame_times.values())))
 
-        logger.debug(f"Video stats - FPS: {fps}, Total frames: {total_frames}, Duration: {duration}s")
-        screenshots = []
+        try:
+            if parallel and workers > 1:
+                video.release()
+                frames = _capture_frames_parallel(
+                    video_path, fps, duration, list(frame_times.values()), preset, workers
+                )
+            else:
+                frames = _capture_frames(video, fps, duration, list(frame_times.values()), preset)
+        finally:
+            video.release()
 
+        screenshots = []
         for timestamp in timestamps:
-            try:
-                # Ensure timestamp is within video duration
-                if timestamp > duration:
-                    logger.warning(f"Timestamp {timestamp}s exceeds video duration {duration}s")
-                    continue
-
-                frame_number = int(timestamp * fps)
-                logger.debug(f"Seeking to frame {frame_number} at timestamp {timestamp}s")
-
-                # Set position and read frame
-                video.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-                success, frame = video.read()
-
-                if success:
-                    # Process frame
-                    height, width = frame.shape[:2]
-                    logger.debug(f"Read frame: {width}x{height}")
-
-                    # Resize if needed
-                    max_size = 800
-                    if width > max_size or height > max_size:
-                        scale = max_size / max(width, height)
-                        frame = cv2.resize(frame, None, fx=scale, fy=scale)
-                        logger.debug(f"Resized frame to {int(width*scale)}x{int(height*scale)}")
-
-                    # Convert to JPG
-                    quality = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
-                    _, buffer = cv2.imencode('.jpg', frame, quality)
-                    if buffer is None:
-                        logger.error("Failed to encode frame to JPEG")
-                        continue
-
-                    base64_image = base64.b64encode(buffer).decode('utf-8')
-                    logger.debug(f"Successfully encoded frame at {timestamp}s")
-
-                    screenshots.append({
-                        "timestamp": timestamp,
-                        "image_base64": base64_image,
-                        "reason": f"Key moment at {timestamp:.2f}s"
-                    })
-                else:
-                    logger.error(f"Failed to read frame at timestamp {timestamp}s")
-
-            except Exception as frame_error:
-                logger.exception(f"Error processing frame at {timestamp}s: {str(frame_error)}")
+            encoded = frames.get(frame_times[timestamp])
+            if encoded is None:
                 continue
+            screenshot = {
+                "timestamp": timestamp,
+                **encoded,
+                "reason": f"Key moment at {timestamp:.2f}s"
+            }
+            if frame_times[timestamp] != timestamp:
+                screenshot["frame_timestamp"] = frame_times[timestamp]
+            screenshots.append(screenshot)
 
-        video.release()
         logger.info(f"Successfully created {len(screenshots)} screenshots")
         return screenshots
 
     except Exception as e:
         logger.exception(f"Error in create_automated_screenshots: {str(e)}")
         return []
+
+
+def _open_video(video_path: str):
+    """Open a video and return (capture, fps, duration), or (None, 0, 0)."""
+    video = cv2.VideoCapture(str(video_path))
+    if not video.isOpened():
+        return None, 0, 0
+
+    fps = video.get(cv2.CAP_PROP_FPS)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = total_frames / fps
+
+    logger.debug(f"Video stats - FPS: {fps}, Total frames: {total_frames}, Duration: {duration}s")
+    return video, fps, duration
+
+
+def _read_frames_forward(video, frame_numbers: list):
+    """
+    Yield (frame_number, frame) for sorted frame numbers in one forward pass.
+
+    Nearby targets are reached with grab(), which skips the colour conversion
+    of frames we do not keep; only long gaps pay for a seek.
+    """
+    position = int(video.get(cv2.CAP_PROP_POS_FRAMES))
+    for target in frame_numbers:
+        if target < position or target - position > SEEK_THRESHOLD_FRAMES:
+            video.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = target
+
+        while position < target:
+            video.grab()
+            position += 1
+
+        success, frame = video.read()
+        position += 1
+        yield target, frame if success else None
+
+
+def _frame_targets(fps: float, duration: float, timestamps: list) -> dict:
+    """Map frame numbers to the timestamps they serve."""
+    frame_timestamps = {}
+    for timestamp in timestamps:
+        # Ensure timestamp is within video duration
+        if timestamp > duration:
+            logger.warning(f"Timestamp {timestamp}s exceeds video duration {duration}s")
+            continue
+        frame_timestamps.setdefault(int(timestamp * fps), []).append(timestamp)
+    return frame_timestamps
+
+
+def _capture_frames(video, fps: float, duration: float, timestamps: list, preset: str) -> dict:
+    """
+    Decode and encode the frames at timestamps; returns {timestamp: encoded}.
+
+    At most ENCODE_WORKERS decoded frames wait on the encoder pool; the
+    oldest is collected before the next frame is decoded, so peak memory
+    does not grow with the number of screenshots.
+    """
+    frame_timestamps = _frame_targets(fps, duration, timestamps)
+    frames = {}
+
+    def collect(frame_number, future):
+        try:
+            encoded = future.result()
+        except Exception as encode_error:
+            logger.error(f"Failed to encode frame {frame_number}: {str(encode_error)}")
+            return
+
+        for timestamp in frame_timestamps[frame_number]:
+            frames[timestamp] = encoded
+
+    pending = deque()
+    for frame_number, frame in _read_frames_forward(video, sorted(frame_timestamps)):
+        if frame is None:
+            logger.error(f"Failed to read frame {frame_number}")
+            continue
+        pending.append((frame_number, submit_frame(frame, preset)))
+        del frame
+        if len(pending) > ENCODE_WORKERS:
+            collect(*pending.popleft())
+
+    while pending:
+        collect(*pending.popleft())
+    return frames
+
+
+_decode_executor = None
+_decode_executor_pid = None
+_decode_executor_lock = threading.Lock()
+
+
+def get_decode_executor() -> ProcessPoolExecutor:
+    """
+    Return the process-wide decode worker pool, recreating it after a fork.
+
+    Workers are spawned rather than forked so they never inherit the
+    threads and locks of a running web worker.
+    """
+    global _decode_executor, _decode_executor_pid
+    with _decode_executor_lock:
+        if _decode_executor is None or _decode_executor_pid != os.getpid():
+            _decode_executor = ProcessPoolExecutor(
+                max_workers=DECODE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+            _decode_executor_pid = os.getpid()
+        return _decode_executor
+
+
+def probe_keyframes(video_path: str, fps: float) -> list:
+    """
+    Return sorted keyframe numbers of the first video stream.
+
+    Reads packet flags with ffprobe, which demuxes without decoding. Returns
+    an empty list if the keyframes cannot be determined.
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                str(video_path),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except Exception as e:
+        logger.warning(f"Could not probe keyframes: {str(e)}")
+        return []
+
+    keyframes = set()
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                keyframes.add(int(round(float(pts_time) * fps)))
+            except ValueError:
+                continue
+    return sorted(keyframes)
+
+
+def split_keyframe_ranges(frame_numbers: list, keyframes: list, parts: int) -> list:
+    """
+    Split sorted frame numbers into at most ``parts`` contiguous groups.
+
+    Groups are only cut at keyframe boundaries, so no two workers decode
+    the same GOP; each group holds roughly the same number of targets.
+    """
+    if not frame_numbers:
+        return []
+
+    target_size = -(-len(frame_numbers) // parts)
+    groups = [[frame_numbers[0]]]
+    for previous, frame_number in zip(frame_numbers, frame_numbers[1:]):
+        # Without keyframe information every frame is its own segment
+        same_segment = bool(keyframes) and bisect_right(keyframes, previous) == bisect_right(keyframes, frame_number)
+        if len(groups[-1]) >= target_size and not same_segment and len(groups) < parts:
+            groups.append([])
+        groups[-1].append(frame_number)
+    return groups
+
+
+def _decode_range_worker(video_path: str, frame_numbers: list, preset: str, shm_name: str) -> list:
+    """
+    Decode and encode one range of frames in a worker process.
+
+    Encoded images are written back to back into the shared memory block
+    created by the parent; only their offsets and metadata are pickled.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    video = cv2.VideoCapture(video_path)
+    try:
+        if not video.isOpened():
+            raise RuntimeError(f"Could not open video file: {video_path}")
+
+        results = []
+        offset = 0
+        for frame_number, frame in _read_frames_forward(video, frame_numbers):
+            if frame is None:
+                continue
+            encoded = encode_frame(frame, preset)
+            data = encoded.pop("image_bytes")
+            if offset + len(data) > shm.size:
+                raise RuntimeError("Encoded frames exceed the shared buffer")
+            shm.buf[offset:offset + len(data)] = data
+            results.append({"frame_number": frame_number, "offset": offset, "length": len(data), **encoded})
+            offset += len(data)
+        return results
+    finally:
+        video.release()
+        shm.close()
+
+
+def _capture_frames_parallel(
+    video_path: str, fps: float, duration: float, timestamps: list, preset: str, workers: int
+) -> dict:
+    """Decode keyframe-aligned ranges in worker processes; returns {timestamp: encoded}."""
+    frame_timestamps = _frame_targets(fps, duration, timestamps)
+    groups = split_keyframe_ranges(sorted(frame_timestamps), probe_keyframes(video_path, fps), workers)
+    logger.debug(f"Decoding {len(frame_timestamps)} frames in {len(groups)} worker processes")
+
+    executor = get_decode_executor()
+    blocks = []
+    frames = {}
+    try:
+        pending = []
+        for group in groups:
+            shm = shared_memory.SharedMemory(create=True, size=len(group) * MAX_ENCODED_FRAME_BYTES)
+            blocks.append(shm)
+            pending.append((shm, executor.submit(_decode_range_worker, str(video_path), group, preset, shm.name)))
+
+        for shm, future in pending:
+            try:
+                results = future.result()
+            except Exception as decode_error:
+                logger.error(f"Failed to decode frame range: {str(decode_error)}")
+                continue
+
+            for result in results:
+                start = result.pop("offset")
+                data = bytes(shm.buf[start:start + result.pop("length")])
+                encoded = {"image_bytes": memoryview(data), **result}
+                for timestamp in frame_timestamps[encoded.pop("frame_number")]:
+                    frames[timestamp] = encoded
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return frames
@@ -0,0 +1,280 @@
+import logging
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from apps.routes.audio_processing import DEFAULT_AUDIO_CODEC, choose_audio_encoding, probe_duration
+from apps.utils.transcription_cache import PCM_OUTPUT_ARGS, hash_pcm_stream
+
+logger = logging.getLogger(__name__)
+
+# Low-rate grayscale thumbnails used for visual analysis
+FRAME_INDEX_FPS = float(os.getenv("FRAME_INDEX_FPS", 2))
+FRAME_INDEX_WIDTH = 160
+FRAME_INDEX_HEIGHT = 90
+SNAP_WINDOW_SECONDS = 0.5
+MOTION_BLOCK_FRAMES = 512
+
+
+class FrameIndex:
+    """
+    Downscaled grayscale frames sampled at a fixed rate, memory-mapped from disk.
+
+    Frame ``i`` shows the video at ``i / fps`` seconds. The frames are only
+    paged in when analysed, so a long video costs disk, not memory.
+    """
+
+    def __init__(self, path: str, fps: float, width: int = FRAME_INDEX_WIDTH, height: int = FRAME_INDEX_HEIGHT):
+        self.path = str(path)
+        self.fps = fps
+        count = os.path.getsize(self.path) // (width * height) if os.path.exists(self.path) else 0
+        if count:
+            self.frames = np.memmap(self.path, dtype=np.uint8, mode="r", shape=(count, height, width))
+        else:
+            self.frames = np.empty((0, height, width), dtype=np.uint8)
+        self._motion = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.fps
+
+    def motion(self) -> np.ndarray:
+        """
+        Mean absolute difference of each frame from the previous one.
+
+        Computed once, in blocks, so only a few hundred thumbnails are paged
+        in at a time. ``motion()[0]`` is 0.
+        """
+        with self._lock:
+            if self._motion is None:
+                motion = np.zeros(len(self), dtype=np.float32)
+                for start in range(1, len(self), MOTION_BLOCK_FRAMES):
+                    block = self.frames[start - 1:start + MOTION_BLOCK_FRAMES].astype(np.int16)
+                    motion[start:start + len(block) - 1] = np.abs(np.diff(block, axis=0)).mean(axis=(1, 2))
+                self._motion = motion
+            return self._motion
+
+    def stable_timestamp(self, timestamp: float, window: float = SNAP_WINDOW_SECONDS) -> float:
+        """
+        Move a timestamp to the stillest sampled frame within ``window`` seconds.
+
+        Stillness is the change into and out of a frame, so screenshots avoid
+        transitions and scrolling. Returns the timestamp unchanged when no
+        sampled frame falls in the window.
+        """
+        first = max(0, int(np.ceil((timestamp - window) * self.fps)))
+        last = min(len(self) - 1, int(np.floor((timestamp + window) * self.fps)))
+        if first > last:
+            return timestamp
+
+        motion = self.motion()
+        outgoing = np.append(motion[1:], 0)
+        stillness = motion[first:last + 1] + outgoing[first:last + 1]
+        # Prefer the frame closest to the requested time among equally still ones
+        distance = np.abs(np.arange(first, last + 1) / self.fps - timestamp)
+        best = np.lexsort((distance, stillness))[0]
+        return (first + int(best)) / self.fps
+
+
+class _FFmpegJob:
+    """
+    One background ffmpeg process with its own completion.
+
+    stderr goes to a log file. If a reader is given, ffmpeg's stdout is piped
+    to it on a thread and its return value is kept as ``output``.
+    """
+
+    def __init__(self, command: list, log_path: Path, reader=None):
+        self._log = open(log_path, "w+b")
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if reader else subprocess.DEVNULL,
+            stderr=self._log,
+        )
+        self.output = None
+        self._error = None
+        self._done = False
+        self._lock = threading.Lock()
+        self._thread = None
+        if reader:
+            self._thread = threading.Thread(target=self._read, args=(reader,), daemon=True)
+            self._thread.start()
+
+    def _read(self, reader):
+        try:
+            self.output = reader(self._process.stdout)
+        except Exception as e:
+            logger.warning(f"Could not read ffmpeg output: {str(e)}")
+        finally:
+            self._process.stdout.close()
+
+    def running(self) -> bool:
+        """Whether ffmpeg has not exited yet."""
+        return self._process.poll() is None
+
+    def wait(self) -> Optional[str]:
+        """Block until ffmpeg exits; returns its error, or None on success."""
+        with self._lock:
+            if not self._done:
+                returncode = self._process.wait()
+                if self._thread:
+                    self._thread.join()
+                self._log.seek(0)
+                log = self._log.read().decode(errors="replace").strip()
+                self._log.close()
+                if returncode != 0:
+                    self._error = log or f"ffmpeg exited with {returncode}"
+                    logger.error(f"Media ingest failed: {self._error}")
+                self._done = True
+            return self._error
+
+    def close(self):
+        """Stop ffmpeg if it is still running; a later wait() reports it as stopped."""
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            if not self._done:
+                self._log.close()
+                self._error = "stopped"
+                self._done = True
+
+
+class MediaIngest:
+    """
+    Decodes an uploaded video once for transcription and visual analysis.
+
+    Two ffmpeg processes run side by side, each decoding one stream. The
+    audio job writes the compressed audio sized for transcription and, from
+    the same decode, a 16 kHz PCM stream that is hashed for the
+    transcription cache. The frame job writes a low-rate downscaled
+    grayscale frame stream for a FrameIndex. ``start()`` returns
+    immediately; ``audio_path()`` and ``pcm_fingerprint()`` wait only for
+    the audio job, which is far cheaper than the video decode, so
+    transcription starts while frames are still being written.
+    ``frame_index()`` waits for the frame job; ``frame_index(wait=False)``
+    lets callers go ahead without the index when a long, high-resolution
+    video is still decoding.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        work_dir: str,
+        include_audio: bool = True,
+        max_size_mb: float = 25,
+        codec: str = DEFAULT_AUDIO_CODEC,
+        frame_fps: float = FRAME_INDEX_FPS,
+        hash_pcm: bool = False,
+    ):
+        self.video_path = str(video_path)
+        self.work_dir = Path(work_dir)
+        self.include_audio = include_audio
+        self.max_size_mb = max_size_mb
+        self.codec = codec
+        self.frame_fps = frame_fps
+        self.hash_pcm = hash_pcm
+        self.duration = None
+        self._frames_path = self.work_dir / "frames.gray"
+        self._audio_path = None
+        self._audio = None
+        self._frames = None
+        self._frame_index = None
+        self._started = False
+
+    def start(self) -> "MediaIngest":
+        """Launch the audio and frame decodes in the background."""
+        self.duration = probe_duration(self.video_path)
+        logger.debug(f"Starting media ingest for {self.video_path}")
+
+        if self.include_audio:
+            try:
+                encoding = choose_audio_encoding(self.duration, self.max_size_mb, self.codec)
+            except ValueError:
+                # Too long for one request; chunked transcription re-splits it anyway
+                encoding = choose_audio_encoding(self.duration, float("inf"), self.codec)
+            self._audio_path = self.work_dir / f"audio{encoding['extension']}"
+            command = [
+                "ffmpeg", "-v", "error", "-y", "-i", self.video_path,
+                "-map", "0:a:0",
+                "-ar", "16000",  # 16kHz sample rate
+                "-ac", "1",  # Mono
+                *encoding["args"],
+                "-f", encoding["format"],
+                str(self._audio_path),
+            ]
+            if self.hash_pcm:
+                command += [*PCM_OUTPUT_ARGS, "pipe:1"]
+            self._audio = _FFmpegJob(
+                command, self.work_dir / "audio.log", reader=hash_pcm_stream if self.hash_pcm else None
+            )
+
+        self._frames = _FFmpegJob(
+            [
+                "ffmpeg", "-v", "error", "-y", "-i", self.video_path,
+                "-map", "0:v:0",
+                "-vf", f"fps={self.frame_fps},scale={FRAME_INDEX_WIDTH}:{FRAME_INDEX_HEIGHT},format=gray",
+                "-f", "rawvideo",
+                "-pix_fmt", "gray",
+                str(self._frames_path),
+            ],
+            self.work_dir / "frames.log",
+        )
+        self._started = True
+        return self
+
+    def _check_started(self):
+        if not self._started:
+            raise RuntimeError("Media ingest has not been started")
+
+    def audio_path(self) -> Optional[str]:
+        """Path of the compressed audio, or None if it could not be extracted."""
+        self._check_started()
+        if self._audio is None or self._audio.wait():
+            return None
+        return str(self._audio_path)
+
+    def pcm_fingerprint(self) -> Optional[str]:
+        """Transcription cache PCM fingerprint of the audio, or None if not hashed."""
+        self._check_started()
+        if self._audio is None or self._audio.wait():
+            return None
+        return self._audio.output
+
+    def frame_index(self, wait: bool = True) -> Optional[FrameIndex]:
+        """
+        The frame index, or None if the frames could not be decoded.
+
+        With ``wait=False``, None is also returned at once while the frame
+        decode is still running.
+        """
+        self._check_started()
+        if not wait and self._frames.running():
+            return None
+        if self._frames.wait():
+            return None
+        if self._frame_index is None:
+            self._frame_index = FrameIndex(self._frames_path, self.frame_fps)
+        return self._frame_index
+
+    def stop_frames(self):
+        """Stop the frame decode, e.g. once nothing will wait for its index."""
+        if self._frames is not None:
+            self._frames.close()
+
+    def close(self):
+        """Stop any decode still running (e.g. the request failed early)."""
+        for job in (self._audio, self._frames):
+            if job is not None:
+                job.close()
@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+
+from apps.utils.audio_chunker import load_pcm, pcm_to_wav
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", os.cpu_count() or 1))
+WHISPER_MAX_CONCURRENCY = int(os.getenv("WHISPER_MAX_CONCURRENCY", 1))
+
+
+class TranscriptionBackend(ABC):
+    """Turns audio into a list of {"word", "start", "end"} dicts."""
+
+    name = "base"
+    model = None
+
+    @abstractmethod
+    def transcribe_words(self, audio_file) -> list:
+        """Transcribe a path or file-like audio source."""
+
+    def transcribe_samples(self, samples, name: str = "chunk.wav") -> list:
+        """Transcribe 16 kHz mono int16 PCM samples."""
+        return self.transcribe_words(pcm_to_wav(samples, name=name))
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """Hosted Whisper API backend."""
+
+    name = "openai"
+    model = "whisper-1"
+
+    def __init__(self):
+        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+    def transcribe_words(self, audio_file) -> list:
+        if hasattr(audio_file, "read"):
+            audio_file.seek(0)
+            return extract_words(self._request(audio_file))
+
+        with open(audio_file, "rb") as f:
+            return extract_words(self._request(f))
+
+    def _request(self, audio_file) -> dict:
+        """Send an open audio file to Whisper and return the verbose JSON response."""
+        transcription = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=audio_file,
+            response_format="verbose_json",
+            timestamp_granularities=["word"]
+        )
+
+        # Convert response to dictionary if it's not already
+        if not isinstance(transcription, dict):
+            transcription = transcription.model_dump()
+        return transcription
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    Offline CPU backend using the openai-whisper package.
+
+    The model is loaded once per process and shared by every request. Work is
+    queued through a bounded executor so concurrent uploads wait their turn
+    instead of oversubscribing the CPU cores torch already spreads across.
+    """
+
+    name = "local"
+    model = WHISPER_MODEL
+
+    _model = None
+    _model_lock = threading.Lock()
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def load_model(cls):
+        """Load the Whisper model once; safe to call before gunicorn forks."""
+        with cls._model_lock:
+            if cls._model is None:
+                import torch
+                import whisper
+
+                torch.set_num_threads(WHISPER_THREADS)
+                logger.info(f"Loading local Whisper model '{WHISPER_MODEL}' with {WHISPER_THREADS} threads")
+                cls._model = whisper.load_model(WHISPER_MODEL, device="cpu")
+            return cls._model
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        # Threads do not survive a fork, so each worker builds its own queue
+        with cls._executor_lock:
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=WHISPER_MAX_CONCURRENCY, thread_name_prefix="whisper"
+                )
+                cls._executor_pid = os.getpid()
+            return cls._executor
+
+    def transcribe_words(self, audio_file) -> list:
+        return self.transcribe_samples(load_pcm(audio_file))
+
+    def transcribe_samples(self, samples, name: str = "chunk.wav") -> list:
+        audio = samples.astype("float32") / 32768.0
+        return self._get_executor().submit(self._run, audio).result()
+
+    def _run(self, audio) -> list:
+        result = self.load_model().transcribe(audio, word_timestamps=True, fp16=False)
+
+        words = []
+        for segment in result.get("segments", []):
+            for word_data in segment.get("words", []):
+                words.append({
+                    "word": word_data["word"].strip(),
+                    "start": round(word_data["start"], 2),
+                    "end": round(word_data["end"], 2)
+                })
+        return words
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+
+
+def get_transcription_backend(name: str = None) -> TranscriptionBackend:
+    """Return the configured transcription backend (TRANSCRIPTION_BACKEND)."""
+    name = name or TRANSCRIPTION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name]()
+
+
+def transcription_cache_namespace(name: str = None) -> str:
+    """Backend and model that produced a transcript, e.g. "local-base", for cache keys."""
+    name = name or TRANSCRIPTION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return f"{name}-{BACKENDS[name].model}"
+
+
+def preload_transcription_backend():
+    """Load the local model at import time so forked workers share it."""
+    if TRANSCRIPTION_BACKEND == LocalWhisperBackend.name:
+        LocalWhisperBackend.load_model()
+
+
+def extract_words(transcription: dict) -> list:
+    """Extract words with timestamps directly from a Whisper API response."""
+    words_with_timestamps = []
+    if isinstance(transcription, dict) and 'words' in transcription:
+        for word_data in transcription['words']:
+            words_with_timestamps.append({
+                "word": word_data['word'],
+                "start": round(word_data['start'], 2),
+                "end": round(word_data['end'], 2)
+            })
+    return words_with_timestamps
@@ -1,58 +1,152 @@
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import os
+import re
 
-def transcribe_audio_with_timestamps(audio_file_path: str) -> dict:
+from apps.routes.transcription_backends import get_transcription_backend
+from apps.utils.audio_chunker import load_pcm, split_audio
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", 300))
+CHUNK_OVERLAP_SECONDS = 1.0
+TRANSCRIPTION_MAX_WORKERS = int(os.getenv("TRANSCRIPTION_MAX_WORKERS", 4))
+DUPLICATE_WINDOW = 0.3  # Same word within this many seconds is an overlap duplicate
+
+def transcribe_audio_with_timestamps(audio_file_path: str, backend: str = None) -> dict:
     """
-    Transcribe an audio file using OpenAI's Whisper model and return words with timestamps.
+    Transcribe an audio file using a Whisper backend and return words with timestamps.
 
     Args:
-        audio_file_path (str): Path to the audio file to transcribe
+        audio_file_path (str | file-like): Path to the audio file to transcribe,
+            or an in-memory buffer whose ``name`` carries the audio extension
+        backend (str): "openai" or "local"; defaults to TRANSCRIPTION_BACKEND
 
     Returns:
         dict: Dictionary containing the transcription with timestamps
     """
     try:
-        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-        with open(audio_file_path, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["word"]
-            )
-
-            # Convert response to dictionary if it's not already
-            if not isinstance(transcription, dict):
-                transcription = transcription.model_dump()
-
-        # Extract words with timestamps directly from the response
-        words_with_timestamps = []
-        if isinstance(transcription, dict) and 'words' in transcription:
-            for word_data in transcription['words']:
-                words_with_timestamps.append({
-                    "word": word_data['word'],
-                    "start": round(word_data['start'], 2),
-                    "end": round(word_data['end'], 2)
-                })
+        words = get_transcription_backend(backend).transcribe_words(audio_file_path)
+
+        result = {
+            "success": True,
+            "words": words,
+            "file_processed": _describe_source(audio_file_path)
+        }
+
+    except FileNotFoundError:
+        result = {
+            "success": False,
+            "error": "Audio file not found",
+            "file_processed": _describe_source(audio_file_path)
+        }
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": str(e),
+            "file_processed": _describe_source(audio_file_path)
+        }
+
+    return result
+
+
+def _describe_source(audio_source) -> str:
+    """Return a printable name for a path or in-memory audio buffer."""
+    if hasattr(audio_source, "read"):
+        return getattr(audio_source, "name", "<in-memory audio>")
+    return audio_source
+
+
+def transcribe_audio_chunked(
+    audio_file_path,
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
+    max_workers: int = TRANSCRIPTION_MAX_WORKERS,
+    backend: str = None,
+) -> dict:
+    """
+    Transcribe long audio by splitting it at silences and transcribing chunks concurrently.
+
+    Args:
+        audio_file_path (str | file-like): Audio or video source readable by ffmpeg
+        chunk_seconds (float): Target chunk length; splits land in the quietest
+            point shortly before this length
+        overlap_seconds (float): Audio shared between neighbouring chunks
+        max_workers (int): Maximum concurrent Whisper requests
+        backend (str): "openai" or "local"; defaults to TRANSCRIPTION_BACKEND
+
+    Returns:
+        dict: Same shape as transcribe_audio_with_timestamps, plus the chunk count
+    """
+    try:
+        samples = load_pcm(audio_file_path)
+        chunks = split_audio(samples, chunk_seconds, overlap_seconds)
+        transcriber = get_transcription_backend(backend)
+
+        def transcribe_chunk(chunk):
+            return transcriber.transcribe_samples(chunk["samples"], name=f"chunk_{chunk['index']}.wav")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            chunk_words = list(executor.map(transcribe_chunk, chunks))
 
         result = {
             "success": True,
-            "words": words_with_timestamps,
-            "file_processed": audio_file_path
+            "words": stitch_chunk_words(chunks, chunk_words),
+            "chunks": len(chunks),
+            "file_processed": _describe_source(audio_file_path)
         }
 
     except FileNotFoundError:
         result = {
             "success": False,
             "error": "Audio file not found",
-            "file_processed": audio_file_path
+            "file_processed": _describe_source(audio_file_path)
         }
     except Exception as e:
+        logger.exception("Chunked transcription failed")
         result = {
             "success": False,
             "error": str(e),
-            "file_processed": audio_file_path
+            "file_processed": _describe_source(audio_file_path)
         }
 
-    return result
\ No newline at end of file
+    return result
+
+
+def stitch_chunk_words(chunks: list, chunk_words: list) -> list:
+    """
+    Merge per-chunk words into one timeline.
+
+    Timestamps are shifted by each chunk's offset, and a word is kept only by
+    the chunk whose core range contains its midpoint, so words heard twice in
+    an overlap appear once. Any remaining back-to-back repeats of the same
+    word at nearly the same time are dropped as well.
+    """
+    stitched = []
+    for chunk, words in zip(chunks, chunk_words):
+        for word in words:
+            start = word["start"] + chunk["offset"]
+            end = word["end"] + chunk["offset"]
+            midpoint = (start + end) / 2
+            if not chunk["core_start"] <= midpoint < chunk["core_end"]:
+                continue
+
+            if stitched:
+                previous = stitched[-1]
+                if (
+                    _normalize_word(previous["word"]) == _normalize_word(word["word"])
+                    and abs(previous["start"] - start) < DUPLICATE_WINDOW
+                ):
+                    continue
+
+            stitched.append({
+                "word": word["word"],
+                "start": round(start, 2),
+                "end": round(end, 2)
+            })
+
+    return stitched
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word).lower()
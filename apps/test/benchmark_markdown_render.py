@@ -0,0 +1,73 @@
+import sys
+import time
+from pathlib import Path
+
+import markdown
+
+# Add the parent directory to Python path to allow imports from apps
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from apps.utils.markdown_renderer import PROFILES, MarkdownRenderer
+
+ROUNDS = 50
+
+# Building blocks of a typical generated README
+SECTION = """## Section {n}
+
+Some introductory text with **bold**, `inline code` and a [link](https://example.com/{n}).
+
+- First item
+- Second item
+    - Nested item
+
+| Option | Default | Description |
+|--------|---------|-------------|
+| `--port` | 5000 | Port to listen on |
+| `--debug` | false | Enable debug mode |
+
+```python
+def handler_{n}(request):
+    return {{"success": True, "section": {n}}}
+```
+
+"""
+
+
+def make_readme(sections: int) -> str:
+    return "# Project\n\n" + "".join(SECTION.format(n=n) for n in range(sections))
+
+
+def time_rounds(render) -> float:
+    """Average milliseconds per call over ROUNDS calls."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        render()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    print(f"Rendering with the 'readme' profile, {ROUNDS} rounds each\n")
+    print(f"{'sections':>8} {'size':>8} {'fresh':>10} {'pooled':>10} {'cached':>10}")
+
+    for sections in (3, 10, 30):
+        text = make_readme(sections)
+
+        # Baseline: a new Markdown instance (and extension load) per call
+        fresh = time_rounds(lambda: markdown.markdown(text, **PROFILES["readme"]()))
+
+        # Pooled instance, cache disabled by making every source unique
+        renderer = MarkdownRenderer()
+        counter = iter(range(10 ** 9))
+        pooled = time_rounds(lambda: renderer.render(f"{text}\n<!-- {next(counter)} -->", "readme"))
+
+        # Repeated preview of identical content
+        renderer.render(text, "readme")
+        cached = time_rounds(lambda: renderer.render(text, "readme"))
+
+        print(f"{sections:>8} {len(text):>7}B {fresh:>8.2f}ms {pooled:>8.2f}ms {cached:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from apps.routes.create_screenshots import create_screenshots_for_keyword
+from apps.utils.frame_encoder import screenshots_to_base64
 
 # Define paths
 SAMPLES_DIR = os.path.join(Path(__file__).parent.parent, "samples")
@@ -40,6 +41,9 @@ def main():
     )
     
     if result["success"]:
+        # Encoded images are raw bytes; store them as base64 in the JSON sample
+        result["screenshots"] = screenshots_to_base64(result["screenshots"])
+
         # Save the results
         with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
             json.dump(result, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+# Add the parent directory to Python path to allow imports from apps
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from apps.routes.transcription_backends import LocalWhisperBackend
+from apps.routes.transcription_with_timestamps import transcribe_audio_with_timestamps
+
+# Define paths
+SAMPLES_DIR = os.path.join(Path(__file__).parent.parent, "samples")
+AUDIO_FILE = os.path.join(SAMPLES_DIR, "sample_audio.wav")
+
+def main():
+    print(f"Processing audio file: {AUDIO_FILE}")
+
+    # Check if input file exists
+    if not os.path.exists(AUDIO_FILE):
+        print(f"Error: Audio file not found at {AUDIO_FILE}")
+        return
+
+    # Load the model up front so the timing below covers transcription only
+    start_time = time.time()
+    LocalWhisperBackend.load_model()
+    print(f"Model loaded in {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    result = transcribe_audio_with_timestamps(AUDIO_FILE, backend="local")
+    print(f"Transcription completed in {time.time() - start_time:.2f} seconds")
+
+    if result["success"]:
+        print(f"\nTranscribed {len(result['words'])} words")
+        print("\nFirst few words with timestamps:")
+        print(json.dumps(result["words"][:5], indent=2, ensure_ascii=False))
+    else:
+        print(f"\nError during transcription:")
+        print(result["error"])
+
+if __name__ == "__main__":
+    main()
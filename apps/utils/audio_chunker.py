@@ -0,0 +1,130 @@
+import logging
+import subprocess
+import wave
+from io import BytesIO
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30  # RMS analysis window
+
+
+def load_pcm(audio_source, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable source to mono 16-bit PCM samples.
+
+    Args:
+        audio_source (str | file-like): Media path or in-memory audio buffer
+        sample_rate (int): Output sample rate in Hz
+
+    Returns:
+        np.ndarray: int16 samples
+    """
+    command = ["ffmpeg", "-v", "error"]
+    stdin_data = None
+    if hasattr(audio_source, "read"):
+        audio_source.seek(0)
+        stdin_data = audio_source.read()
+        command += ["-i", "pipe:0"]
+    else:
+        command += ["-i", str(audio_source)]
+
+    command += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"]
+    result = subprocess.run(command, input=stdin_data, check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def frame_rms(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Return the RMS energy of consecutive fixed-size frames."""
+    frame_size = int(sample_rate * frame_ms / 1000)
+    frame_count = len(samples) // frame_size
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = samples[: frame_count * frame_size].astype(np.float32).reshape(frame_count, frame_size)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def find_split_points(
+    samples: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float = 10.0,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = FRAME_MS,
+) -> List[int]:
+    """
+    Find sample offsets to split audio at, preferring the quietest frame.
+
+    Each split is placed at the lowest-energy frame within the last
+    search_seconds before a chunk would reach chunk_seconds, so cuts land in
+    pauses rather than mid-word.
+
+    Returns:
+        list: Sample indices of the split points (excluding 0 and the end)
+    """
+    rms = frame_rms(samples, sample_rate, frame_ms)
+    frames_per_second = 1000 / frame_ms
+    chunk_frames = int(chunk_seconds * frames_per_second)
+    search_frames = max(1, min(int(search_seconds * frames_per_second), chunk_frames // 2))
+    frame_size = int(sample_rate * frame_ms / 1000)
+
+    splits = []
+    chunk_start = 0
+    while len(rms) - chunk_start > chunk_frames:
+        window_end = chunk_start + chunk_frames
+        window_start = window_end - search_frames
+        quietest = window_start + int(np.argmin(rms[window_start:window_end]))
+        splits.append(quietest * frame_size)
+        chunk_start = quietest
+
+    return splits
+
+
+def split_audio(
+    samples: np.ndarray,
+    chunk_seconds: float,
+    overlap_seconds: float = 1.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Dict]:
+    """
+    Split PCM samples at silence boundaries with a small overlap.
+
+    Returns:
+        list: Chunks with their samples, the absolute offset of the first
+        sample, and the core [start, end) range in seconds this chunk owns
+        when stitching words back together
+    """
+    boundaries = [0] + find_split_points(samples, chunk_seconds, sample_rate=sample_rate) + [len(samples)]
+    overlap = int(overlap_seconds * sample_rate)
+    chunks = []
+
+    for index in range(len(boundaries) - 1):
+        core_start, core_end = boundaries[index], boundaries[index + 1]
+        padded_start = max(0, core_start - overlap)
+        padded_end = min(len(samples), core_end + overlap)
+        chunks.append({
+            "index": index,
+            "samples": samples[padded_start:padded_end],
+            "offset": padded_start / sample_rate,
+            "core_start": core_start / sample_rate,
+            "core_end": core_end / sample_rate if index < len(boundaries) - 2 else float("inf"),
+        })
+
+    logger.debug(f"Split {len(samples) / sample_rate:.1f}s of audio into {len(chunks)} chunks")
+    return chunks
+
+
+def pcm_to_wav(samples: np.ndarray, name: str = "chunk.wav", sample_rate: int = SAMPLE_RATE) -> BytesIO:
+    """Wrap int16 PCM samples in an in-memory WAV file."""
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
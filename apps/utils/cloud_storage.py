@@ -1,64 +1,280 @@
+from abc import ABC, abstractmethod
 import boto3
+import hashlib
 import os
+import tempfile
+import threading
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import base64
 from io import BytesIO
 import logging
+import mimetypes
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
-class CloudStorage:
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 32))
+# Set S3_OBJECT_ACL to an empty string for buckets that disallow ACLs
+S3_OBJECT_ACL = os.getenv("S3_OBJECT_ACL", "public-read")
+LOCAL_STORAGE_DIR = os.getenv(
+    "LOCAL_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "readmeplease_media")
+)
+LOCAL_MEDIA_BASE_URL = os.getenv("LOCAL_MEDIA_BASE_URL", "").rstrip("/")
+MEDIA_URL_PREFIX = "/media"
+IMAGE_PREFIX = "blog-images"
+KNOWN_KEYS_MAX = 10000
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class StorageBackend(ABC):
+    """
+    Content-addressed image storage.
+
+    Images are keyed by the SHA-256 of their bytes, with the extension taken
+    from the filename, so identical images share one object and are never
+    overwritten. Subclasses implement _exists, _put, read_image and url_for.
+    """
+
+    name = None
+
     def __init__(self):
+        self._known_keys = OrderedDict()
+        self._known_keys_lock = threading.Lock()
+
+    def check_bucket(self):
+        """Verify the backend is reachable; a no-op unless overridden."""
+
+    @abstractmethod
+    def url_for(self, file_key: str) -> str:
+        """Public URL of a stored object."""
+
+    @abstractmethod
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Inverse of url_for, or None if the URL is not served by this backend."""
+
+    @abstractmethod
+    def read_image(self, file_key: str) -> bytes:
+        """Return the bytes of a stored object."""
+
+    @abstractmethod
+    def _exists(self, file_key: str) -> bool:
+        """Whether an object is stored under file_key."""
+
+    @abstractmethod
+    def _put(self, file_key: str, image_bytes: bytes, content_type: str):
+        """Store an object under file_key."""
+
+    def _object_exists(self, file_key: str) -> bool:
+        """Check for an object, remembering keys that exist."""
+        with self._known_keys_lock:
+            if file_key in self._known_keys:
+                self._known_keys.move_to_end(file_key)
+                return True
+
+        if not self._exists(file_key):
+            return False
+        self._remember_key(file_key)
+        return True
+
+    def _remember_key(self, file_key: str):
+        with self._known_keys_lock:
+            self._known_keys[file_key] = True
+            self._known_keys.move_to_end(file_key)
+            while len(self._known_keys) > KNOWN_KEYS_MAX:
+                self._known_keys.popitem(last=False)
+
+    def upload_image(self, image_data: Union[str, bytes, memoryview], filename: str) -> str:
+        """
+        Upload an image (raw bytes or base64 string) and return its public URL.
+
+        An image that is already stored is not uploaded again.
+        """
+        try:
+            self.check_bucket()
+
+            # Accept raw encoded bytes directly; base64 only arrives from the browser
+            if isinstance(image_data, str):
+                image_bytes = base64.b64decode(image_data)
+            else:
+                image_bytes = bytes(image_data)
+            extension = os.path.splitext(filename)[1].lower() or '.jpg'
+            file_key = f"{IMAGE_PREFIX}/{hashlib.sha256(image_bytes).hexdigest()}{extension}"
+            content_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
+            url = self.url_for(file_key)
+
+            if self._object_exists(file_key):
+                logger.info(f"Image {filename} already stored as {file_key}")
+                return url
+
+            self._put(file_key, image_bytes, content_type)
+            self._remember_key(file_key)
+            logger.info(f"Successfully uploaded {filename}")
+            logger.info(f"Generated URL: {url}")
+            return url
+
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            error_code = error.get('Code', 'Unknown')
+            error_message = error.get('Message', str(e))
+            logger.error(f"Upload failed with error {error_code}: {error_message}")
+            return None
+
+        except Exception as e:
+            logger.error(f"Failed to process image: {str(e)}")
+            return None
+
+
+class S3Storage(StorageBackend):
+    name = "s3"
+
+    def __init__(self, check_bucket: bool = True):
+        super().__init__()
         try:
             logger.info(f"Initializing S3 client with region: {os.getenv('AWS_REGION')}")
             logger.info(f"Bucket name: {os.getenv('AWS_BUCKET_NAME')}")
-            
+
+            # Pooled keep-alive connections shared by every upload thread
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                 aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_REGION')
+                region_name=os.getenv('AWS_REGION'),
+                config=Config(
+                    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=True,
+                    retries={"max_attempts": 3, "mode": "standard"},
+                )
             )
             self.bucket_name = os.getenv('AWS_BUCKET_NAME')
-            
-            # Simple bucket existence check
-            self.s3_client.head_bucket(Bucket=self.bucket_name)
-            logger.info(f"Successfully connected to bucket: {self.bucket_name}")
-            
+            self._bucket_checked = False
+            self._bucket_lock = threading.Lock()
+
+            if check_bucket:
+                self.check_bucket()
+
         except Exception as e:
             logger.error(f"Failed to initialize S3 client: {str(e)}")
             raise
 
-    def upload_image(self, image_data: str, filename: str) -> str:
-        """Upload base64 image to cloud storage and return public URL"""
+    def check_bucket(self):
+        """Verify the bucket exists; a successful check is cached for the client's lifetime."""
+        if self._bucket_checked:
+            return
+        with self._bucket_lock:
+            if not self._bucket_checked:
+                # Simple bucket existence check
+                self.s3_client.head_bucket(Bucket=self.bucket_name)
+                logger.info(f"Successfully connected to bucket: {self.bucket_name}")
+                self._bucket_checked = True
+
+    def url_for(self, file_key: str) -> str:
+        return f"https://{self.bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{file_key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        prefix = self.url_for("")
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    def read_image(self, file_key: str) -> bytes:
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
+        return response["Body"].read()
+
+    def _exists(self, file_key: str) -> bool:
         try:
-            # Convert base64 to bytes
-            image_bytes = base64.b64decode(image_data)
-            file_key = f"blog-images/{filename}"
-
-            # Direct upload approach
-            try:
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=file_key,
-                    Body=image_bytes,
-                    ContentType='image/jpeg',
-                    ACL='public-read'
-                )
-                logger.info(f"Successfully uploaded {filename}")
-                
-                # Return the URL
-                url = f"https://{self.bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{file_key}"
-                logger.info(f"Generated URL: {url}")
-                return url
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)
+            return True
+        except ClientError as e:
+            # Without s3:ListBucket a missing object reports 403; upload anyway
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound', '403', 'Forbidden'):
+                return False
+            raise
 
-            except ClientError as e:
-                error = e.response.get('Error', {})
-                error_code = error.get('Code', 'Unknown')
-                error_message = error.get('Message', str(e))
-                logger.error(f"Upload failed with error {error_code}: {error_message}")
-                return None
+    def _put(self, file_key: str, image_bytes: bytes, content_type: str):
+        extra = {"ACL": S3_OBJECT_ACL} if S3_OBJECT_ACL else {}
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=file_key,
+            Body=image_bytes,
+            ContentType=content_type,
+            # Content-addressed objects never change
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+            **extra
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to process image: {str(e)}")
-            return None 
\ No newline at end of file
+
+# Existing callers construct CloudStorage directly
+CloudStorage = S3Storage
+
+
+class LocalStorage(StorageBackend):
+    """
+    Images stored on the local filesystem and served by the /media route.
+
+    URLs are relative (/media/<key>) unless LOCAL_MEDIA_BASE_URL is set.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_MEDIA_BASE_URL):
+        super().__init__()
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url
+
+    def path_for(self, file_key: str) -> Path:
+        """Filesystem path of a key; raises ValueError for keys outside the root."""
+        path = (self.root / file_key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid storage key: {file_key}")
+        return path
+
+    def url_for(self, file_key: str) -> str:
+        return f"{self.base_url}{MEDIA_URL_PREFIX}/{file_key}"
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        prefix = self.url_for("")
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    def read_image(self, file_key: str) -> bytes:
+        return self.path_for(file_key).read_bytes()
+
+    def _exists(self, file_key: str) -> bool:
+        return self.path_for(file_key).exists()
+
+    def _put(self, file_key: str, image_bytes: bytes, content_type: str):
+        path = self.path_for(file_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(temp_path, path)
+
+
+STORAGE_BACKENDS = {
+    "s3": lambda: S3Storage(check_bucket=False),
+    "local": LocalStorage,
+}
+
+_storage = None
+_storage_pid = None
+_storage_lock = threading.Lock()
+
+
+def get_cloud_storage() -> StorageBackend:
+    """
+    Return the process-wide storage backend selected by STORAGE_BACKEND.
+
+    The backend is created on first use; an S3 bucket is checked lazily on
+    the first upload. A new client is built after a fork, since boto3
+    connection pools must not be shared between processes.
+    """
+    global _storage, _storage_pid
+    with _storage_lock:
+        if _storage is None or _storage_pid != os.getpid():
+            if STORAGE_BACKEND not in STORAGE_BACKENDS:
+                raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+            _storage = STORAGE_BACKENDS[STORAGE_BACKEND]()
+            _storage_pid = os.getpid()
+        return _storage
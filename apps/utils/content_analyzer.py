@@ -1,41 +1,22 @@
 from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
+import json
+import logging
+import os
 import re
 
-def analyze_content(transcript_words: List[Dict]) -> dict:
-    """Analyze transcript content to identify meaningful moments."""
-    try:
-        # Group words into coherent segments based on natural pauses
-        PAUSE_THRESHOLD = 1.0  # 1 second pause indicates potential new segment
-        segments = []
-        current_segment = []
-
-        for i, word in enumerate(transcript_words):
-            current_segment.append(word)
-
-            # Check for natural pause or end of transcript
-            is_last_word = i == len(transcript_words) - 1
-            next_word_gap = (transcript_words[i + 1]["start"] - word["end"]) if not is_last_word else 0
-
-            if next_word_gap > PAUSE_THRESHOLD or is_last_word:
-                if current_segment:
-                    segment_text = " ".join([w["word"] for w in current_segment])
-                    segments.append({
-                        "text": segment_text,
-                        "start": current_segment[0]["start"],
-                        "end": current_segment[-1]["end"]
-                    })
-                    current_segment = []
+from .lexical_scorer import prefilter_segment
+from .token_budget import pack_by_token_budget
+from .transcript_timeline import TranscriptTimeline
 
-        # Use GPT to identify segments with visual demonstrations
-        client = OpenAI()
-        meaningful_moments = []
+logger = logging.getLogger(__name__)
+
+PAUSE_THRESHOLD = 1.0  # 1 second pause indicates potential new segment
+BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKENS", 1500))
+ANALYSIS_MAX_PARALLEL = int(os.getenv("ANALYSIS_MAX_PARALLEL", 4))
 
-        for segment in segments:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": """
+SYSTEM_PROMPT = """
                      Analyze if this segment describes a visual demonstration or key concept.
                      Look for phrases like:
                      - "as you can see"
@@ -44,24 +25,146 @@ def analyze_content(transcript_words: List[Dict]) -> dict:
                      - "in this example"
                      - "demonstration of"
                      - Visual descriptions of algorithms or processes
-                     """},
-                    {"role": "user", "content": f"Is this segment describing something visual that should be captured as a screenshot? Only respond with YES or NO:\n{segment['text']}"}
-                ],
-                temperature=0.3,
-            )
+                     """
+
+BATCH_INSTRUCTIONS = """
+You will receive numbered transcript segments. For every segment decide whether it
+describes something visual that should be captured as a screenshot.
+Respond with a JSON object of the form:
+{"segments": [{"id": 1, "answer": "YES", "confidence": 0.9}, ...]}
+Include every id exactly once. "answer" is YES or NO and "confidence" is between 0 and 1.
+"""
+
+
+def segment_transcript(transcript_words) -> List[Dict]:
+    """Group words into coherent segments based on natural pauses."""
+    if not isinstance(transcript_words, TranscriptTimeline):
+        transcript_words = TranscriptTimeline.from_words(transcript_words)
+    return transcript_words.segments(PAUSE_THRESHOLD)
+
 
-            if "YES" in response.choices[0].message.content.upper():
+def analyze_content(transcript_words) -> dict:
+    """Analyze transcript content to identify meaningful moments."""
+    try:
+        segments = segment_transcript(transcript_words)
+
+        # Resolve clear-cut segments locally; only ambiguous ones reach the LLM
+        decisions = {}
+        escalated = []
+        for segment_id, segment in enumerate(segments):
+            decision = prefilter_segment(segment["text"])
+            if decision is None:
+                escalated.append((segment_id, segment))
+            else:
+                decisions[segment_id] = decision
+
+        # Use GPT to identify segments with visual demonstrations
+        if escalated:
+            decisions.update(classify_segments(OpenAI(), escalated))
+
+        meaningful_moments = []
+        for segment_id, segment in enumerate(segments):
+            decision = decisions.get(segment_id)
+            if decision and decision["visual"]:
                 # Calculate middle of segment for timestamp
                 timestamp = (segment["start"] + segment["end"]) / 2
                 meaningful_moments.append({
                     "timestamp": timestamp,
-                    "text": segment["text"]
+                    "text": segment["text"],
+                    "confidence": decision["confidence"]
                 })
 
         return {
             "success": True,
-            "moments": meaningful_moments
+            "moments": meaningful_moments,
+            "stats": {
+                "segments": len(segments),
+                "decided_locally": len(segments) - len(escalated),
+                "escalated": len(escalated)
+            }
         }
 
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+def classify_segments(client: OpenAI, numbered_segments: List[tuple]) -> Dict[int, Dict]:
+    """
+    Classify segments in token-budgeted batches, running batches concurrently.
+
+    Args:
+        client (OpenAI): Client used for every batch
+        numbered_segments (list): (segment index, segment) pairs
+
+    Returns:
+        dict: Segment index -> {"visual": bool, "confidence": float}
+    """
+    batches = pack_by_token_budget(
+        numbered_segments, BATCH_TOKEN_BUDGET, text_of=lambda item: item[1]["text"]
+    )
+    logger.debug(f"Classifying {len(numbered_segments)} segments in {len(batches)} batches")
+
+    decisions = {}
+    if not batches:
+        return decisions
+
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_MAX_PARALLEL, len(batches)))) as executor:
+        for batch_decisions in executor.map(lambda batch: _classify_batch(client, batch), batches):
+            decisions.update(batch_decisions)
+    return decisions
+
+
+def _classify_batch(client: OpenAI, batch: List) -> Dict[int, Dict]:
+    """Classify one batch in a single call, falling back to per-segment calls."""
+    # Ids in the prompt are 1-based within the batch
+    numbered_text = "\n".join(
+        f"{position}. {segment['text']}" for position, (_, segment) in enumerate(batch, 1)
+    )
+
+    try:
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT + BATCH_INSTRUCTIONS},
+                {"role": "user", "content": numbered_text}
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"},
+        )
+        answers = json.loads(response.choices[0].message.content)["segments"]
+
+        decisions = {}
+        for answer in answers:
+            position = int(answer["id"])
+            if 1 <= position <= len(batch):
+                decisions[batch[position - 1][0]] = {
+                    "visual": str(answer.get("answer", "")).upper().startswith("YES"),
+                    "confidence": float(answer.get("confidence", 0.5)),
+                }
+
+        if len(decisions) == len(batch):
+            return decisions
+        logger.warning(f"Batch response covered {len(decisions)} of {len(batch)} segments")
+
+    except Exception as e:
+        logger.warning(f"Batch classification failed, classifying segments one by one: {str(e)}")
+        decisions = {}
+
+    for segment_id, segment in batch:
+        if segment_id not in decisions:
+            decisions[segment_id] = _classify_single(client, segment)
+    return decisions
+
+
+def _classify_single(client: OpenAI, segment: Dict) -> Dict:
+    """Classify a single segment with a plain YES/NO prompt."""
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Is this segment describing something visual that should be captured as a screenshot? Only respond with YES or NO:\n{segment['text']}"}
+        ],
+        temperature=0.3,
+    )
+    visual = "YES" in response.choices[0].message.content.upper()
+    return {"visual": visual, "confidence": 1.0 if visual else 0.0}
@@ -1,105 +1,299 @@
-import markdown
+import logging
+import os
 import re
-from typing import List, Dict
-from markdown.extensions import Extension
-from markdown.preprocessors import Preprocessor
-from .cloud_storage import CloudStorage
-
-class HTMLPreservationExtension(Extension):
-    def extendMarkdown(self, md):
-        md.preprocessors.register(HTMLPreservationPreprocessor(md), 'html_preservation', 175)
-
-class HTMLPreservationPreprocessor(Preprocessor):
-    def run(self, lines):
-        new_lines = []
-        for line in lines:
-            if '<div class="blog-image">' in line:
-                new_lines.extend(['', line, ''])
-            else:
-                new_lines.append(line)
-        return new_lines
-
-def generate_markdown_content(document_content: str, screenshots: List[Dict]) -> dict:
-    """Generate markdown content with cloud-hosted image references."""
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+from .cloud_storage import get_cloud_storage
+from .frame_encoder import screenshot_bytes
+from .image_derivatives import generate_derivatives
+# HTMLPreservationExtension is re-exported for existing imports
+from .markdown_renderer import HTMLPreservationExtension, render_markdown
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", 8))
+MARKER_PATTERN = re.compile(r'<screenshot\s+time="([\d.]+)"\s+description="([^"]+)"\s*/>')
+# A screenshot in generated markdown: the image and its italic caption
+IMAGE_CAPTION_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)\n\*\1\*')
+MAX_MARKER_DISTANCE = 5.0
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    """Return the process-wide bounded upload pool, recreating it after a fork."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix="image-upload")
+            _executor_pid = os.getpid()
+        return _executor
+
+def nearest_timestamp(sorted_timestamps: List[float], timestamp: float, max_distance: float = MAX_MARKER_DISTANCE):
+    """Nearest of sorted timestamps by binary search, or None if none is within max_distance."""
+    index = bisect_left(sorted_timestamps, timestamp)
+    # The nearest value is the insertion neighbour on one side; ties go to the earlier one
+    candidates = sorted_timestamps[max(0, index - 1):index + 1]
+    if not candidates:
+        return None
+    closest = min(candidates, key=lambda t: abs(t - timestamp))
+    return closest if abs(closest - timestamp) < max_distance else None
+
+def resolve_markers(document_content: str, screenshots: List[Dict]) -> List[Tuple]:
+    """
+    Match every screenshot marker to its nearest screenshot.
+
+    Returns:
+        list: (marker match, screenshot timestamp or None) per marker, in
+        document order
+    """
+    sorted_timestamps = sorted({s['timestamp'] for s in screenshots})
+    return [
+        (marker, nearest_timestamp(sorted_timestamps, float(marker.group(1))))
+        for marker in MARKER_PATTERN.finditer(document_content)
+    ]
+
+def upload_screenshots(screenshots: List[Dict], derivatives: bool = True) -> Dict:
+    """
+    Upload screenshots concurrently on the shared upload pool.
+
+    Screenshots sharing a timestamp are uploaded once. With derivatives, each screenshot's thumbnail and
+    responsive WebP/JPEG variants are built in one batch on the encoder
+    pool and uploaded alongside it.
+
+    Returns:
+        dict: image_urls (timestamp -> URL, or None if the upload failed;
+        pass to generate_markdown_content), image_sets (timestamp ->
+        responsive image set for the HTML preview) and
+        failures (timestamp, filename and error per failed image)
+    """
+    cloud_storage = get_cloud_storage()
+    unique = {s['timestamp']: s for s in screenshots}
+    derived = dict(zip(unique, generate_derivatives(list(unique.values())))) if derivatives else {}
+
+    def upload(filename, image):
+        try:
+            url = cloud_storage.upload_image(screenshot_bytes(image), filename)
+            return url, None if url else "Upload failed"
+        except Exception as e:
+            return None, str(e)
+
+    # (timestamp, role, image, filename) for every image to store
+    jobs = []
+    for timestamp, screenshot in unique.items():
+        jobs.append((timestamp, "main", screenshot, f"screenshot_{timestamp:.2f}{screenshot.get('extension', '.jpg')}"))
+        images = derived.get(timestamp)
+        if images:
+            thumbnail = images["thumbnail"]
+            jobs.append((timestamp, "thumbnail", thumbnail, f"screenshot_{timestamp:.2f}_thumb{thumbnail['extension']}"))
+            for variant in images["variants"]:
+                jobs.append((timestamp, "variant", variant, f"screenshot_{timestamp:.2f}_{variant['width']}w{variant['extension']}"))
+
+    executor = get_upload_executor()
+    futures = [executor.submit(upload, filename, image) for _, _, image, filename in jobs]
+
+    image_urls = {}
+    uploaded = {}
+    failures = []
+    for (timestamp, role, image, filename), future in zip(jobs, futures):
+        url, error = future.result()
+        if role == "main":
+            image_urls[timestamp] = url
+        if error:
+            failures.append({"timestamp": timestamp, "filename": filename, "error": error})
+        elif url:
+            uploaded.setdefault(timestamp, []).append((role, image, url))
+
+    image_sets = {
+        timestamp: _build_image_set(uploaded.get(timestamp, []))
+        for timestamp, url in image_urls.items() if url
+    }
+
+    if failures:
+        logger.warning(f"{len(failures)} of {len(jobs)} screenshot uploads failed")
+    return {"image_urls": image_urls, "image_sets": image_sets, "failures": failures}
+
+def _build_image_set(uploaded: List[Tuple]) -> Dict:
+    """Group uploaded (role, image, url) entries into srcset strings by MIME type."""
+    main = next(image for role, image, _ in uploaded if role == "main")
+    main_url = next(url for role, _, url in uploaded if role == "main")
+    main_type = main.get('mime_type', 'image/jpeg')
+
+    candidates = {}
+    thumbnail = None
+    for role, image, url in uploaded:
+        if role == "thumbnail":
+            thumbnail = url
+        if image.get('width'):
+            candidates.setdefault(image.get('mime_type', 'image/jpeg'), {})[image['width']] = url
+
+    def srcset(mime_type):
+        return ", ".join(f"{url} {width}w" for width, url in sorted(candidates.get(mime_type, {}).items()))
+
+    return {
+        "src": main_url,
+        "width": main.get('width'),
+        "height": main.get('height'),
+        "thumbnail": thumbnail,
+        "srcset": srcset(main_type),
+        # Alternative formats offered ahead of the <img> fallback
+        "sources": {
+            mime_type: srcset(mime_type) for mime_type in candidates if mime_type != main_type
+        },
+    }
+
+def _picture_html(image_set: Dict, description: str) -> str:
+    """Responsive <picture> element for the HTML preview."""
+    sizes = f"(max-width: {image_set['width']}px) 100vw, {image_set['width']}px" if image_set.get('width') else "100vw"
+    sources = "".join(
+        f'\n        <source type="{mime_type}" srcset="{srcset}" sizes="{sizes}">'
+        for mime_type, srcset in image_set["sources"].items() if srcset
+    )
+    dimensions = (
+        f' width="{image_set["width"]}" height="{image_set["height"]}"'
+        if image_set.get('width') and image_set.get('height') else ""
+    )
+    srcset = f'\n             srcset="{image_set["srcset"]}" sizes="{sizes}"' if image_set.get('srcset') else ""
+    return f'''
+<div class="blog-image">
+    <picture>{sources}
+        <img src="{image_set['src']}"{srcset}
+             alt="{description}"{dimensions} loading="lazy" decoding="async">
+    </picture>
+    <div class="caption">
+        <p>{description}</p>
+    </div>
+</div>
+'''
+
+def _render_marker(description: str, image_url: str, image_set: Dict, matched: bool) -> Tuple[str, str]:
+    """Markdown and HTML replacements for one screenshot marker."""
+    if not matched:
+        return (
+            f"\n\n[Image placeholder: {description}]\n\n",
+            f'\n<div class="placeholder">[Image placeholder: {description}]</div>\n'
+        )
+
+    if not image_url:
+        return (
+            f"\n\n[Image upload failed: {description}]\n\n",
+            f'\n<div class="placeholder">[Image upload failed: {description}]</div>\n'
+        )
+
+    # Use cloud URL for both markdown and HTML
+    markdown_image = f"\n\n![{description}]({image_url})\n"
+    markdown_image += f"*{description}*\n\n"
+
+    if image_set:
+        return markdown_image, _picture_html(image_set, description)
+
+    html_image = f'''
+<div class="blog-image">
+    <img src="{image_url}"
+         alt="{description}">
+    <div class="caption">
+        <p>{description}</p>
+    </div>
+</div>
+'''
+    return markdown_image, html_image
+
+def render_document_html(markdown_content: str, image_sets: Dict[str, Dict]) -> str:
+    """
+    Render edited document markdown for the preview with responsive images.
+
+    Screenshots written by generate_markdown_content (an image followed by
+    its caption) whose URL has an image set get their <picture> markup back;
+    anything else is rendered as written.
+
+    Args:
+        markdown_content (str): Document markdown
+        image_sets (dict): Image URL -> responsive image set
+    """
+    def replace(match):
+        image_set = image_sets.get(match.group(2))
+        return _picture_html(image_set, match.group(1)) if image_set else match.group(0)
+
+    return render_markdown(IMAGE_CAPTION_PATTERN.sub(replace, markdown_content), profile="document")
+
+def generate_markdown_content(
+    document_content: str,
+    screenshots: List[Dict],
+    image_urls: Dict[float, str] = None,
+    image_sets: Dict[float, Dict] = None,
+) -> dict:
+    """
+    Generate markdown content with cloud-hosted image references.
+
+    Every marker is resolved to a screenshot first and the referenced
+    screenshots are uploaded concurrently, each once, unless image_urls
+    from upload_screenshots is given. The markdown links one image per
+    marker; the HTML preview uses the responsive image_sets where present.
+    """
     try:
         if not document_content:
             return {
+                "success": False,
+                "error": "No document content provided",
                 "raw": "Error: No document content provided",
                 "html": "<p>Error: No document content provided</p>"
             }
             
         if not screenshots:
             return {
+                "success": True,
                 "raw": document_content,
-                "html": markdown.markdown(document_content)
+                "html": render_markdown(document_content)
             }
 
-        # Initialize cloud storage
-        cloud_storage = CloudStorage()
-        
-        # Create a mapping of available screenshots
-        screenshot_map = {round(s['timestamp'], 1): s for s in screenshots}
-        
-        # Extract screenshot markers and their descriptions
-        marker_pattern = r'<screenshot\s+time="([\d.]+)"\s+description="([^"]+)"\s*/>'
-        markers = list(re.finditer(marker_pattern, document_content))
-
-        # Create two versions: one for markdown file and one for HTML preview
-        markdown_content = document_content
-        html_content = document_content
-
-        for marker in markers:
-            timestamp = float(marker.group(1))
-            description = marker.group(2)
-
-            closest_timestamp = min(screenshot_map.keys(),
-                                key=lambda x: abs(x - timestamp),
-                                default=None)
-
-            if closest_timestamp and abs(closest_timestamp - timestamp) < 5.0:
-                screenshot = screenshot_map[closest_timestamp]
-                
-                # Upload image and get URL
-                filename = f"screenshot_{closest_timestamp:.2f}.jpg"
-                image_url = cloud_storage.upload_image(screenshot['image_base64'], filename)
-                
-                if image_url:
-                    # Use cloud URL for both markdown and HTML
-                    markdown_image = f"\n\n![{description.strip()}]({image_url})\n"
-                    markdown_image += f"*{description.strip()}*\n\n"
-                    
-                    html_image = f'''
-<div class="blog-image">
-    <img src="{image_url}"
-         alt="{description.strip()}">
-    <div class="caption">
-        <p>{description.strip()}</p>
-    </div>
-</div>
-'''
-                else:
-                    markdown_image = f"\n\n[Image upload failed: {description.strip()}]\n\n"
-                    html_image = f'\n<div class="placeholder">[Image upload failed: {description.strip()}]</div>\n'
-            else:
-                markdown_image = f"\n\n[Image placeholder: {description.strip()}]\n\n"
-                html_image = f'\n<div class="placeholder">[Image placeholder: {description.strip()}]</div>\n'
-
-            markdown_content = markdown_content.replace(marker.group(0), markdown_image)
-            html_content = html_content.replace(marker.group(0), html_image)
-
-        html_content = markdown.markdown(
-            html_content,
-            extensions=['extra', HTMLPreservationExtension()],
-            output_format='html5'
-        )
+        screenshot_map = {s['timestamp']: s for s in screenshots}
+        markers = resolve_markers(document_content, screenshots)
+
+        upload_failures = []
+        if image_urls is None:
+            referenced = {timestamp for _, timestamp in markers if timestamp is not None}
+            upload_result = upload_screenshots([screenshot_map[t] for t in referenced])
+            image_urls = upload_result["image_urls"]
+            image_sets = upload_result["image_sets"]
+            upload_failures = upload_result["failures"]
+        image_sets = image_sets or {}
+
+        # Build the markdown file and the HTML preview together in one pass
+        # over the markers, copying the text between them once
+        markdown_parts = []
+        html_parts = []
+        position = 0
+        for marker, closest_timestamp in markers:
+            text = document_content[position:marker.start()]
+            markdown_image, html_image = _render_marker(
+                marker.group(2).strip(),
+                image_urls.get(closest_timestamp) if closest_timestamp is not None else None,
+                image_sets.get(closest_timestamp),
+                matched=closest_timestamp is not None
+            )
+            markdown_parts += [text, markdown_image]
+            html_parts += [text, html_image]
+            position = marker.end()
+
+        markdown_content = "".join(markdown_parts) + document_content[position:]
+        html_content = "".join(html_parts) + document_content[position:]
+
+        html_content = render_markdown(html_content, profile="document")
 
         return {
+            "success": True,
             "raw": markdown_content,
-            "html": html_content
+            "html": html_content,
+            "upload_failures": upload_failures
         }
 
     except Exception as e:
         return {
+            "success": False,
+            "error": str(e),
             "raw": f"Error generating markdown: {str(e)}",
             "html": f"<p>Error generating markdown: {str(e)}</p>"
         }
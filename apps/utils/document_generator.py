@@ -1,19 +1,29 @@
 from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import os
+import re
 
+from .token_budget import count_tokens, pack_by_token_budget
+from .transcript_timeline import TranscriptTimeline
+
+logger = logging.getLogger(__name__)
+
+DOC_CHUNK_TOKENS = int(os.getenv("DOC_CHUNK_TOKENS", 2500))
+DOC_MERGE_TOKENS = int(os.getenv("DOC_MERGE_TOKENS", 3000))
+DOC_MAX_PARALLEL = int(os.getenv("DOC_MAX_PARALLEL", 4))
+
+MARKER_PATTERN = re.compile(r'<screenshot\s+time="[\d.]+"\s+description="[^"]+"\s*/>')
 
-def generate_document_from_transcript(transcript_text: str, timestamps: list = None) -> dict:
-    """Generate an explanatory document with screenshot markers using actual timestamps."""
-    try:
-        client = OpenAI()
 
-        # Create timestamp guidance (for placement only)
-        timestamp_guidance = ""
-        if timestamps:
-            timestamp_str = ", ".join([f"{t:.2f}s" for t in timestamps])
-            timestamp_guidance = f"\nUse these exact timestamps for screenshots: {timestamp_str}"
+def _build_system_prompt(timestamps: list = None) -> str:
+    # Create timestamp guidance (for placement only)
+    timestamp_guidance = ""
+    if timestamps:
+        timestamp_str = ", ".join([f"{t:.2f}s" for t in timestamps])
+        timestamp_guidance = f"\nUse these exact timestamps for screenshots: {timestamp_str}"
 
-        system_prompt = f"""You are an expert technical writer. When writing about technical
+    return f"""You are an expert technical writer. When writing about technical
         concepts or visual elements, mark where screenshots should be embedded using this format:
 
         <screenshot time="timestamp" description="description"/>
@@ -28,10 +38,16 @@ def generate_document_from_transcript(transcript_text: str, timestamps: list = N
 
         Your output should be valid HTML/Markdown mixed content."""
 
+
+def generate_document_from_transcript(transcript_text: str, timestamps: list = None) -> dict:
+    """Generate an explanatory document with screenshot markers using actual timestamps."""
+    try:
+        client = OpenAI()
+
         response = client.chat.completions.create(
             model="gpt-4",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _build_system_prompt(timestamps)},
                 {"role": "user", "content": f"Create a technical explanation document from this transcript with screenshot markers at the provided timestamps:\n\n{transcript_text}"}
             ],
             temperature=0.7,
@@ -48,3 +64,134 @@ def generate_document_from_transcript(transcript_text: str, timestamps: list = N
             "success": False,
             "error": str(e)
         }
+
+
+def generate_document_chunked(
+    timeline: TranscriptTimeline,
+    timestamps: list = None,
+    chunk_tokens: int = DOC_CHUNK_TOKENS,
+    max_workers: int = DOC_MAX_PARALLEL,
+) -> dict:
+    """
+    Generate a document from a long transcript with a map-reduce over chunks.
+
+    The transcript is split on pause boundaries into token-budgeted chunks
+    (long stretches without a pause are split between words), each chunk is drafted concurrently with only the screenshot timestamps in
+    its own time range, and a final pass merges the drafts. Transcripts that
+    fit in one chunk go through generate_document_from_transcript unchanged.
+    """
+    try:
+        timestamps = sorted(timestamps or [])
+        chunks = pack_by_token_budget(
+            _split_oversized(timeline, timeline.pause_boundaries(), chunk_tokens, model="gpt-4"),
+            chunk_tokens,
+            text_of=lambda bounds: timeline.text(*bounds),
+            model="gpt-4",
+        )
+
+        if len(chunks) <= 1:
+            return generate_document_from_transcript(timeline.text(), timestamps)
+
+        client = OpenAI()
+        jobs = []
+        for number, chunk in enumerate(chunks):
+            first, last = chunk[0][0], chunk[-1][1]
+            # Each chunk owns the time up to the next chunk's first word
+            range_start = float(timeline.start[first]) if number else float("-inf")
+            range_end = float(timeline.start[last]) if last < len(timeline) else float("inf")
+            jobs.append({
+                "part": number + 1,
+                "text": timeline.text(first, last),
+                "timestamps": [t for t in timestamps if range_start <= t < range_end],
+            })
+
+        logger.debug(f"Drafting document in {len(jobs)} chunks")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+            drafts = list(executor.map(lambda job: _draft_chunk(client, job, len(jobs)), jobs))
+
+        document = _merge_drafts(client, drafts)
+        return {
+            "success": True,
+            "document_content": document,
+            "has_markers": "<screenshot" in document,
+            "chunks": len(jobs)
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+def _split_oversized(timeline: TranscriptTimeline, bounds: list, budget: int, model: str) -> list:
+    """
+    Split (first, last) word ranges that exceed the token budget on their own.
+
+    Oversized ranges are halved at word boundaries until every piece fits,
+    so no chunk is larger than the budget unless a single word is.
+    """
+    pieces = []
+    stack = list(reversed(bounds))
+    while stack:
+        first, last = stack.pop()
+        if last - first > 1 and count_tokens(timeline.text(first, last), model) > budget:
+            middle = (first + last) // 2
+            stack += [(middle, last), (first, middle)]
+        else:
+            pieces.append((first, last))
+    return pieces
+
+
+def _draft_chunk(client: OpenAI, job: dict, total_parts: int) -> str:
+    """Draft the document section for one transcript chunk."""
+    response = client.chat.completions.create(
+        model="gpt-4",
+        messages=[
+            {"role": "system", "content": _build_system_prompt(job["timestamps"])},
+            {"role": "user", "content": (
+                f"This is part {job['part']} of {total_parts} of a transcript. Write the section of a "
+                "technical explanation document that covers only this part, with screenshot markers at "
+                "the provided timestamps. Do not add an introduction or conclusion for the whole "
+                f"document unless this is the first or last part:\n\n{job['text']}"
+            )}
+        ],
+        temperature=0.7,
+    )
+    return response.choices[0].message.content
+
+
+def _merge_drafts(client: OpenAI, drafts: list) -> str:
+    """
+    Join section drafts into one document.
+
+    Small sets of drafts get a final GPT pass to smooth transitions; if the
+    drafts are too large for one request, or the merge drops screenshot
+    markers, the drafts are concatenated in order instead.
+    """
+    joined = "\n\n".join(draft.strip() for draft in drafts)
+    if count_tokens(joined, "gpt-4") > DOC_MERGE_TOKENS:
+        return joined
+
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": "You are an expert technical writer. Your output should be valid HTML/Markdown mixed content."},
+                {"role": "user", "content": (
+                    "Merge these consecutive document sections into one coherent document. Remove "
+                    "repetition and add transitions, but keep every <screenshot .../> marker exactly "
+                    f"as written:\n\n{joined}"
+                )}
+            ],
+            temperature=0.3,
+        )
+        merged = response.choices[0].message.content
+    except Exception as e:
+        logger.warning(f"Merge pass failed, concatenating drafts: {str(e)}")
+        return joined
+
+    if len(MARKER_PATTERN.findall(merged)) < len(MARKER_PATTERN.findall(joined)):
+        logger.warning("Merge pass dropped screenshot markers, concatenating drafts")
+        return joined
+    return merged
@@ -0,0 +1,126 @@
+import base64
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Encoding presets for screenshots. OpenCV releases the GIL while resizing and
+# encoding, so these run in parallel on the encoder pool.
+ENCODE_PRESETS = {
+    "jpeg": {
+        "extension": ".jpg",
+        "mime_type": "image/jpeg",
+        "params": [int(cv2.IMWRITE_JPEG_QUALITY), 85],
+    },
+    "jpeg_small": {
+        "extension": ".jpg",
+        "mime_type": "image/jpeg",
+        "params": [int(cv2.IMWRITE_JPEG_QUALITY), 70],
+    },
+    "webp": {
+        "extension": ".webp",
+        "mime_type": "image/webp",
+        "params": [int(cv2.IMWRITE_WEBP_QUALITY), 80],
+    },
+    "webp_small": {
+        "extension": ".webp",
+        "mime_type": "image/webp",
+        "params": [int(cv2.IMWRITE_WEBP_QUALITY), 60],
+    },
+}
+
+DEFAULT_PRESET = os.getenv("SCREENSHOT_PRESET", "jpeg")
+MAX_SCREENSHOT_SIZE = 800
+ENCODE_WORKERS = int(os.getenv("SCREENSHOT_ENCODE_WORKERS", min(4, os.cpu_count() or 1)))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Return the process-wide encoder pool, recreating it after a fork."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=ENCODE_WORKERS, thread_name_prefix="frame-encoder"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def resize_frame(frame, max_size: int = MAX_SCREENSHOT_SIZE):
+    """Downscale a frame so its longest side is at most max_size pixels."""
+    height, width = frame.shape[:2]
+    if width > max_size or height > max_size:
+        scale = max_size / max(width, height)
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def encode_frame(frame, preset: str = DEFAULT_PRESET, max_size: int = MAX_SCREENSHOT_SIZE) -> Dict:
+    """
+    Resize and encode a single frame.
+
+    Args:
+        frame: BGR frame as read by OpenCV
+        preset (str): Key into ENCODE_PRESETS
+        max_size (int): Longest side of the encoded image in pixels
+
+    Returns:
+        dict: image_bytes (memoryview over the encoded buffer), mime_type,
+        extension, width and height
+    """
+    settings = ENCODE_PRESETS.get(preset)
+    if settings is None:
+        raise ValueError(f"Unknown encode preset: {preset}")
+
+    frame = resize_frame(frame, max_size)
+    success, buffer = cv2.imencode(settings["extension"], frame, settings["params"])
+    if not success or buffer is None:
+        raise ValueError(f"Failed to encode frame as {settings['mime_type']}")
+
+    height, width = frame.shape[:2]
+    return {
+        # Keep the encoded ndarray alive through a memoryview instead of copying it
+        "image_bytes": memoryview(buffer).cast("B"),
+        "mime_type": settings["mime_type"],
+        "extension": settings["extension"],
+        "width": width,
+        "height": height,
+    }
+
+
+def submit_frame(frame, preset: str = DEFAULT_PRESET, max_size: int = MAX_SCREENSHOT_SIZE) -> Future:
+    """Schedule a frame for encoding on the shared pool."""
+    return get_encode_executor().submit(encode_frame, frame, preset, max_size)
+
+
+def encode_frames(frames: List, preset: str = DEFAULT_PRESET, max_size: int = MAX_SCREENSHOT_SIZE) -> List[Dict]:
+    """Encode frames concurrently, preserving their order."""
+    futures = [submit_frame(frame, preset, max_size) for frame in frames]
+    return [future.result() for future in futures]
+
+
+def screenshot_bytes(screenshot: Dict):
+    """Return the encoded image of a screenshot as a bytes-like object."""
+    if screenshot.get("image_bytes") is not None:
+        return screenshot["image_bytes"]
+    return base64.b64decode(screenshot["image_base64"])
+
+
+def screenshots_to_base64(screenshots: List[Dict]) -> List[Dict]:
+    """Convert screenshots to JSON-safe dicts with base64 images for templates."""
+    converted = []
+    for screenshot in screenshots:
+        item = {k: v for k, v in screenshot.items() if k != "image_bytes"}
+        if "image_base64" not in item:
+            item["image_base64"] = base64.b64encode(screenshot["image_bytes"]).decode("utf-8")
+        converted.append(item)
+    return converted
@@ -0,0 +1,66 @@
+import logging
+import os
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from .frame_encoder import encode_frame, get_encode_executor, screenshot_bytes
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 240
+# Longest side of each responsive variant, in pixels
+DERIVATIVE_SIZES = [int(size) for size in os.getenv("IMAGE_DERIVATIVE_SIZES", "400,800").split(",")]
+DERIVATIVE_PRESETS = ["webp", "jpeg"]
+THUMBNAIL_PRESET = "jpeg_small"
+
+
+def make_derivatives(image_bytes) -> Dict:
+    """
+    Build the thumbnail and responsive variants of one encoded screenshot.
+
+    The screenshot is decoded once and every size/format is encoded from
+    that frame. Variants are never upscaled, and a JPEG variant at the
+    source size is skipped because the original screenshot already is one.
+
+    Returns:
+        dict: thumbnail (encoded image) and variants (encoded images, each
+        with its preset), as returned by frame_encoder.encode_frame
+    """
+    frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode screenshot")
+    source_size = max(frame.shape[:2])
+
+    variants = []
+    for size in sorted({min(size, source_size) for size in DERIVATIVE_SIZES}):
+        for preset in DERIVATIVE_PRESETS:
+            if preset == "jpeg" and size == source_size:
+                continue
+            variants.append({"preset": preset, **encode_frame(frame, preset, max_size=size)})
+
+    return {
+        "thumbnail": encode_frame(frame, THUMBNAIL_PRESET, max_size=THUMBNAIL_SIZE),
+        "variants": variants,
+    }
+
+
+def generate_derivatives(screenshots: List[Dict]) -> List[Dict]:
+    """
+    Build derivatives for many screenshots in one batch on the encoder pool.
+
+    Returns one entry per screenshot, in order; an entry is None if that
+    screenshot could not be processed.
+    """
+    executor = get_encode_executor()
+    futures = [executor.submit(make_derivatives, screenshot_bytes(s)) for s in screenshots]
+
+    derivatives = []
+    for screenshot, future in zip(screenshots, futures):
+        try:
+            derivatives.append(future.result())
+        except Exception as e:
+            logger.error(f"Failed to build derivatives for {screenshot.get('timestamp')}s: {str(e)}")
+            derivatives.append(None)
+    return derivatives
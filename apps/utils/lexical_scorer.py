@@ -0,0 +1,108 @@
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+# Phrases that almost always narrate something on screen
+CUE_PHRASES = [
+    "as you can see",
+    "you can see",
+    "we can see",
+    "here's how",
+    "here is how",
+    "this shows",
+    "this is showing",
+    "in this example",
+    "demonstration of",
+    "let me show you",
+    "i'll show you",
+    "take a look",
+    "look at this",
+    "on the screen",
+    "on screen",
+    "shown here",
+    "if we look at",
+    "click on",
+    "if i click",
+    "over here",
+    "right here",
+]
+
+# Words that point at something visible
+DEICTIC_WORDS = [
+    "this", "these", "here", "there", "that", "those",
+    "see", "look", "shows", "showing", "shown", "displayed",
+    "screen", "click", "button", "page", "window", "tab", "menu",
+    "diagram", "chart", "graph", "dashboard", "interface", "output",
+]
+
+ACCEPT_THRESHOLD = float(os.getenv("LEXICAL_ACCEPT_THRESHOLD", 0.6))
+REJECT_THRESHOLD = float(os.getenv("LEXICAL_REJECT_THRESHOLD", 0.1))
+MIN_SEGMENT_WORDS = 4
+
+# Longest phrases first so overlapping cues match the most specific one
+_CUE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(p) for p in sorted(CUE_PHRASES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_DEICTIC_PATTERN = re.compile(r"\b(?:" + "|".join(DEICTIC_WORDS) + r")\b", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"[\w']+")
+
+_stats = {"local_yes": 0, "local_no": 0, "escalated": 0}
+_stats_lock = threading.Lock()
+
+
+def score_segment(text: str) -> float:
+    """
+    Score how likely a segment narrates something visual, from 0 to 1.
+
+    Cue phrases dominate the score; the share of deictic words adds a smaller
+    amount. Segments shorter than MIN_SEGMENT_WORDS are damped because they
+    rarely carry enough context for a useful screenshot.
+    """
+    word_count = len(_WORD_PATTERN.findall(text))
+    if word_count == 0:
+        return 0.0
+
+    cue_hits = len(_CUE_PATTERN.findall(text))
+    deictic_hits = len(_DEICTIC_PATTERN.findall(text))
+
+    score = min(cue_hits * 0.5, 0.8) + min(deictic_hits / word_count * 1.5, 0.3)
+    if word_count < MIN_SEGMENT_WORDS:
+        score *= 0.5
+    return min(score, 1.0)
+
+
+def prefilter_segment(
+    text: str, accept: float = ACCEPT_THRESHOLD, reject: float = REJECT_THRESHOLD
+) -> Optional[Dict]:
+    """
+    Decide a segment locally when the score is clear-cut.
+
+    Raising ``accept`` and lowering ``reject`` sends more segments to the LLM
+    (higher precision); narrowing the gap saves more calls.
+
+    Returns:
+        dict: {"visual": bool, "confidence": float}, or None to escalate
+    """
+    score = score_segment(text)
+
+    if score >= accept:
+        decision = {"visual": True, "confidence": score}
+        counter = "local_yes"
+    elif score <= reject:
+        decision = {"visual": False, "confidence": 1.0 - score}
+        counter = "local_no"
+    else:
+        decision = None
+        counter = "escalated"
+
+    with _stats_lock:
+        _stats[counter] += 1
+    return decision
+
+
+def get_prefilter_stats() -> Dict:
+    """Return process-wide counts of locally decided versus escalated segments."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+import markdown
+from markdown.extensions import Extension
+from markdown.preprocessors import Preprocessor
+
+logger = logging.getLogger(__name__)
+
+RENDER_CACHE_SIZE = int(os.getenv("MARKDOWN_RENDER_CACHE_SIZE", 256))
+
+
+class HTMLPreservationExtension(Extension):
+    def extendMarkdown(self, md):
+        md.preprocessors.register(HTMLPreservationPreprocessor(md), 'html_preservation', 175)
+
+class HTMLPreservationPreprocessor(Preprocessor):
+    def run(self, lines):
+        new_lines = []
+        for line in lines:
+            if '<div class="blog-image">' in line:
+                new_lines.extend(['', line, ''])
+            else:
+                new_lines.append(line)
+        return new_lines
+
+
+# Markdown configurations, built once per thread and reused
+PROFILES = {
+    # Plain markdown.markdown() defaults
+    "plain": lambda: {},
+    # Video documents with embedded screenshot HTML
+    "document": lambda: {
+        "extensions": ['extra', HTMLPreservationExtension()],
+        "output_format": 'html5',
+    },
+    # Combined README preview
+    "readme": lambda: {
+        "extensions": [
+            'markdown.extensions.extra',
+            'markdown.extensions.codehilite',
+            'markdown.extensions.tables',
+            'markdown.extensions.toc',
+            'markdown.extensions.fenced_code',
+            'markdown.extensions.sane_lists'
+        ],
+        "output_format": 'html5',
+    },
+}
+
+
+class MarkdownRenderer:
+    """
+    Render markdown with pooled Markdown instances and an HTML cache.
+
+    Building a Markdown instance loads every extension (codehilite pulls in
+    Pygments), so each thread keeps one instance per profile and calls
+    reset() between documents. Rendered HTML is kept in a bounded LRU keyed
+    by a hash of the profile and source, so re-rendering the same content
+    is a dictionary lookup.
+    """
+
+    def __init__(self, cache_size: int = RENDER_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _get_markdown(self, profile: str) -> markdown.Markdown:
+        instances = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        md = instances.get(profile)
+        if md is None:
+            if profile not in PROFILES:
+                raise ValueError(f"Unknown markdown profile: {profile}")
+            md = instances[profile] = markdown.Markdown(**PROFILES[profile]())
+        return md
+
+    @staticmethod
+    def cache_key(text: str, profile: str = "plain") -> str:
+        """Cache key of a source under a profile."""
+        return hashlib.sha256(f"{profile}\0{text}".encode("utf-8")).hexdigest()
+
+    def render(self, text: str, profile: str = "plain") -> str:
+        """Render markdown to HTML, serving repeated content from the cache."""
+        key = self.cache_key(text, profile)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return html
+            self._misses += 1
+
+        html = self._get_markdown(profile).reset().convert(text)
+
+        with self._lock:
+            self._cache[key] = html
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return html
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self._hits, "misses": self._misses}
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_markdown_renderer() -> MarkdownRenderer:
+    """Return the process-wide markdown renderer."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = MarkdownRenderer()
+        return _renderer
+
+
+def render_markdown(text: str, profile: str = "plain") -> str:
+    """Render markdown with the shared renderer."""
+    return get_markdown_renderer().render(text, profile)
@@ -0,0 +1,115 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", 8))
+
+
+class StageFailed(Exception):
+    """Raised by a stage to abort the pipeline with a user-facing message."""
+
+
+class PipelineError(Exception):
+    """Raised by StagePipeline.run when a stage fails."""
+
+    def __init__(self, stage: str, error: Exception, timings: Dict[str, Dict]):
+        super().__init__(str(error))
+        self.stage = stage
+        self.error = error
+        self.timings = timings
+
+
+class StagePipeline:
+    """
+    Run named stages as a dependency graph on a thread pool.
+
+    Each stage is a callable that receives the results of its dependencies
+    as keyword arguments named after them. A stage starts as soon as all of
+    its dependencies have finished, so independent branches (for example
+    screenshot capture and document generation) run concurrently. Start and
+    end times of every stage are recorded relative to the start of the run.
+
+    Example:
+        pipeline = StagePipeline()
+        pipeline.add("transcript", load_transcript)
+        pipeline.add("summary", summarize, deps=["transcript"])
+        results = pipeline.run()
+    """
+
+    def __init__(self, max_workers: int = PIPELINE_MAX_WORKERS):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Dict] = {}
+        self.timings: Dict[str, Dict] = {}
+
+    def add(self, name: str, func: Callable, deps: List[str] = ()) -> "StagePipeline":
+        """Register a stage; dependencies must already be registered."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+        self.stages[name] = {"func": func, "deps": list(deps)}
+        return self
+
+    def run(self) -> Dict[str, object]:
+        """
+        Execute every stage and return {stage name: result}.
+
+        If a stage raises, no further stages are started, running stages are
+        allowed to finish, and a PipelineError naming the stage is raised.
+        """
+        results = {}
+        self.timings = {}
+        waiting = dict(self.stages)
+        running = {}
+        failure = None
+        started = time.perf_counter()
+
+        def run_stage(name, func, kwargs):
+            stage_start = time.perf_counter()
+            try:
+                return func(**kwargs)
+            finally:
+                self.timings[name] = {
+                    "start": round(stage_start - started, 3),
+                    "end": round(time.perf_counter() - started, 3),
+                }
+
+        workers = max(1, min(self.max_workers, len(self.stages)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as executor:
+            while waiting or running:
+                if failure is None:
+                    ready = [
+                        name for name, stage in waiting.items()
+                        if all(dep in results for dep in stage["deps"])
+                    ]
+                    for name in ready:
+                        stage = waiting.pop(name)
+                        kwargs = {dep: results[dep] for dep in stage["deps"]}
+                        running[executor.submit(run_stage, name, stage["func"], kwargs)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        if failure is None:
+                            failure = (name, e)
+
+        total = round(time.perf_counter() - started, 3)
+        logger.debug(
+            f"Pipeline finished in {total}s: "
+            + ", ".join(f"{name} {t['start']}-{t['end']}s" for name, t in self.timings.items())
+        )
+
+        if failure is not None:
+            raise PipelineError(failure[0], failure[1], self.timings)
+        return results
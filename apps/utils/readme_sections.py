@@ -0,0 +1,48 @@
+import hashlib
+import json
+from typing import Dict, List, Tuple
+
+from .markdown_renderer import get_markdown_renderer
+
+# Sections are rendered one at a time with the combined README profile
+SECTION_PROFILE = "readme"
+
+
+def inputs_hash(**inputs) -> str:
+    """Stable hash of the inputs a section was generated from."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def build_section_block(name: str, kind: str, source: str, inputs: Dict, html: str = None) -> Dict:
+    """
+    Render one README section into a result block.
+
+    Args:
+        name (str): Section name (e.g. "features", or "video")
+        kind (str): "video" or "github"
+        source (str): Section markdown
+        inputs (dict): What the section was generated from
+        html (str): Fragment already rendered from richer HTML than the
+            markdown carries (the video section's responsive images); by
+            default the markdown is rendered
+
+    Returns:
+        dict: name, kind, markdown, rendered html fragment, inputs_hash and
+        the render cache_key of the fragment (None for a given html)
+    """
+    renderer = get_markdown_renderer()
+    return {
+        "name": name,
+        "kind": kind,
+        "markdown": source,
+        "html": renderer.render(source, SECTION_PROFILE) if html is None else html,
+        "inputs_hash": inputs_hash(**inputs),
+        "cache_key": renderer.cache_key(source, SECTION_PROFILE) if html is None else None,
+    }
+
+
+def join_section_blocks(blocks: List[Dict]) -> Tuple[str, str]:
+    """Combined (markdown, html) of a result, joined from its section blocks."""
+    markdown_content = "".join(block["markdown"] + "\n\n" for block in blocks)
+    markdown_html = "\n".join(block["html"] for block in blocks)
+    return markdown_content, markdown_html
@@ -0,0 +1,136 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .readme_sections import join_section_blocks
+
+logger = logging.getLogger(__name__)
+
+RESULT_DIR = os.getenv("RESULT_DIR", os.path.join(tempfile.gettempdir(), "readmeplease_results"))
+RESULT_TTL_HOURS = float(os.getenv("RESULT_TTL_HOURS", 72))
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ResultStore:
+    """
+    Manifests of finished documents, stored as JSON under a result id.
+
+    A manifest records the final markdown, its section blocks and the URLs
+    of its already uploaded images, so downloads are served by id without
+    the browser posting the document or any image data back.
+    """
+
+    def __init__(self, result_dir: str = RESULT_DIR, ttl_hours: float = RESULT_TTL_HOURS):
+        self.result_dir = Path(result_dir)
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_hours = ttl_hours
+        self._lock = threading.Lock()
+        self._lock_path = self.result_dir / ".lock"
+
+    def _path(self, result_id: str) -> Path:
+        if not _ID_PATTERN.match(result_id or ""):
+            raise ValueError("Invalid result id")
+        return self.result_dir / f"{result_id}.json"
+
+    def save(self, markdown_content: str, image_urls: List[Dict] = None, **metadata) -> str:
+        """
+        Store a result manifest and return its id.
+
+        Args:
+            markdown_content (str): Final markdown document
+            image_urls (list): {"timestamp", "url"} for each uploaded image
+            **metadata: Extra JSON-serialisable fields (e.g. transcript_id)
+        """
+        self._remove_expired()
+
+        result_id = uuid.uuid4().hex
+        manifest = {
+            "result_id": result_id,
+            "created": time.time(),
+            "markdown_content": markdown_content,
+            "image_urls": image_urls or [],
+            **metadata,
+        }
+
+        self._write(result_id, manifest)
+        return result_id
+
+    def _write(self, result_id: str, manifest: Dict):
+        path = self._path(result_id)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)
+
+    @contextmanager
+    def _locked(self):
+        """Serialise manifest edits across threads and worker processes."""
+        with self._lock, open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def replace_section(self, result_id: str, index: int, block: Dict) -> Optional[Dict]:
+        """
+        Swap one section block of a stored result and re-join its markdown.
+
+        The manifest is re-read under the lock, so sections edited by other
+        requests since the caller read it are kept.
+
+        Returns:
+            dict: The updated manifest, or None if the result or section no
+            longer exists
+        """
+        with self._locked():
+            manifest = self.get(result_id)
+            if manifest is None:
+                return None
+            sections = manifest.get("sections", [])
+            if not 0 <= index < len(sections):
+                return None
+            sections[index] = block
+            manifest["markdown_content"] = join_section_blocks(sections)[0]
+            self._write(result_id, manifest)
+            return manifest
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        """Return a manifest, or None if it does not exist."""
+        try:
+            with open(self._path(result_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _remove_expired(self):
+        cutoff = time.time() - self.ttl_hours * 3600
+        for path in self.result_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Return the process-wide result store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
@@ -1,21 +1,25 @@
 from openai import OpenAI
 import json
 from .content_analyzer import analyze_content
+from .transcript_timeline import TranscriptTimeline
 
 
-def select_screenshot_moments(transcript_words: list) -> dict:
+def select_screenshot_moments(transcript_words) -> dict:
     """Select moments for screenshots based on content analysis."""
     try:
-        if not transcript_words:
+        if not len(transcript_words):
             return {"success": False, "error": "No transcript provided"}
 
+        if not isinstance(transcript_words, TranscriptTimeline):
+            transcript_words = TranscriptTimeline.from_words(transcript_words)
+
         # Get content analysis
         analysis = analyze_content(transcript_words)
         if not analysis["success"]:
             return analysis
 
         # Get total duration
-        duration = transcript_words[-1]["end"]
+        duration = transcript_words.duration
         MIN_GAP = 3.0  # Minimum 3 seconds between screenshots
 
         # Prioritize content-based moments
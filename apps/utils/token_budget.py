@@ -0,0 +1,53 @@
+import logging
+from functools import lru_cache
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Rough estimate used when tiktoken has no encoding available
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # tiktoken downloads its encodings on first use, which fails offline
+        logger.warning(f"Falling back to character-based token estimates: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count the tokens text will use for model."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text))
+
+
+def pack_by_token_budget(
+    items: List, budget: int, text_of: Callable = str, model: str = "gpt-3.5-turbo"
+) -> List[List]:
+    """
+    Group items, in order, into batches whose combined text fits the token budget.
+
+    An item larger than the budget on its own gets a batch to itself.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for item in items:
+        tokens = count_tokens(text_of(item), model)
+        if current and current_tokens + tokens > budget:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
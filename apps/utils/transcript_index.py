@@ -0,0 +1,92 @@
+import bisect
+import string
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .transcript_timeline import TranscriptTimeline
+
+
+def normalize_token(text: str) -> str:
+    """Lowercase a word and strip surrounding whitespace and punctuation."""
+    return text.strip().strip(string.punctuation + "“”‘’").lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a query into normalized tokens."""
+    return [token for token in (normalize_token(part) for part in text.split()) if token]
+
+
+class TranscriptIndex:
+    """
+    Inverted index from normalized token to word positions in a timeline.
+
+    Positions are sorted NumPy arrays, so phrase queries are a chain of
+    vectorised membership tests on consecutive offsets.
+    """
+
+    def __init__(self, timeline: TranscriptTimeline):
+        self.timeline = timeline
+        self.postings: Dict[str, np.ndarray] = {}
+
+        # Group positions by vocabulary code, then merge codes sharing a token
+        # ("The" and "the," both index under "the")
+        order = np.argsort(timeline.codes, kind="stable")
+        sorted_codes = timeline.codes[order]
+        unique_codes, first_positions = np.unique(sorted_codes, return_index=True)
+        groups = np.split(order, first_positions[1:]) if len(order) else []
+
+        merged: Dict[str, List[np.ndarray]] = {}
+        for code, positions in zip(unique_codes.tolist(), groups):
+            token = normalize_token(timeline.vocabulary[code])
+            if token:
+                merged.setdefault(token, []).append(positions)
+
+        for token, arrays in merged.items():
+            self.postings[token] = np.sort(np.concatenate(arrays)) if len(arrays) > 1 else arrays[0]
+
+        # Sorted vocabulary of tokens for prefix queries
+        self.tokens = sorted(self.postings)
+
+    @classmethod
+    def from_words(cls, words: List[Dict]) -> "TranscriptIndex":
+        return cls(TranscriptTimeline.from_words(words))
+
+    def positions(self, token: str) -> np.ndarray:
+        """Word positions of a single normalized token."""
+        return self.postings.get(token, np.empty(0, dtype=np.int64))
+
+    def prefix_positions(self, prefix: str) -> np.ndarray:
+        """Word positions of every token starting with prefix."""
+        prefix = normalize_token(prefix)
+        if not prefix:
+            return np.empty(0, dtype=np.int64)
+
+        first = bisect.bisect_left(self.tokens, prefix)
+        last = bisect.bisect_left(self.tokens, prefix + "\U0010ffff")
+        matches = [self.postings[token] for token in self.tokens[first:last]]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(matches))
+
+    def phrase_positions(self, phrase: str) -> np.ndarray:
+        """Positions of the first word of every occurrence of a phrase."""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = self.positions(tokens[0])
+        for offset, token in enumerate(tokens[1:], 1):
+            if not len(candidates):
+                break
+            candidates = candidates[np.isin(candidates + offset, self.positions(token))]
+        return candidates
+
+    def search(self, query: str) -> List[Tuple[int, int]]:
+        """[first, last) word index ranges of every occurrence of query."""
+        length = len(tokenize(query))
+        return [(int(first), int(first) + length) for first in self.phrase_positions(query)]
+
+    def timestamps(self, query: str) -> np.ndarray:
+        """Start times of every occurrence of query."""
+        return self.timeline.start[self.phrase_positions(query)]
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .transcript_index import TranscriptIndex, tokenize
+from .transcript_timeline import TranscriptTimeline
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.getenv(
+    "TRANSCRIPT_STORE_DIR", os.path.join(tempfile.gettempdir(), "readmeplease_transcript_store")
+)
+STORE_CACHE_SIZE = int(os.getenv("TRANSCRIPT_STORE_CACHE_SIZE", 32))
+# Matches RESULT_TTL_HOURS so stored results can still regenerate their video section
+TRANSCRIPT_TTL_HOURS = float(os.getenv("TRANSCRIPT_TTL_HOURS", 72))
+SEARCH_MODES = ("word", "phrase", "prefix")
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class TranscriptStore:
+    """
+    Per-upload transcript timelines persisted as compressed NumPy archives.
+
+    The search index is built once when a transcript is saved and kept in a
+    small in-memory LRU; other workers rebuild it on their first lookup.
+    """
+
+    def __init__(
+        self,
+        store_dir: str = STORE_DIR,
+        cache_size: int = STORE_CACHE_SIZE,
+        ttl_hours: float = TRANSCRIPT_TTL_HOURS,
+    ):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self.ttl_hours = ttl_hours
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, transcript_id: str) -> Path:
+        if not _ID_PATTERN.match(transcript_id or ""):
+            raise ValueError("Invalid transcript id")
+        return self.store_dir / f"{transcript_id}.npz"
+
+    def save(self, timeline: TranscriptTimeline) -> str:
+        """Persist a timeline and return its transcript id."""
+        self._remove_expired()
+
+        transcript_id = uuid.uuid4().hex
+        path = self._path(transcript_id)
+        temp_path = path.with_suffix(".tmp.npz")
+        np.savez_compressed(
+            temp_path,
+            codes=timeline.codes,
+            start=timeline.start,
+            end=timeline.end,
+            vocabulary=np.array(json.dumps(timeline.vocabulary, ensure_ascii=False)),
+        )
+        os.replace(temp_path, path)
+
+        self._remember(transcript_id, TranscriptIndex(timeline))
+        return transcript_id
+
+    def get_index(self, transcript_id: str) -> Optional[TranscriptIndex]:
+        """Return the search index of a stored transcript, or None if unknown."""
+        with self._lock:
+            index = self._indexes.get(transcript_id)
+            if index is not None:
+                self._indexes.move_to_end(transcript_id)
+                return index
+
+        try:
+            with np.load(self._path(transcript_id)) as data:
+                timeline = TranscriptTimeline(
+                    json.loads(str(data["vocabulary"])), data["codes"], data["start"], data["end"]
+                )
+        except FileNotFoundError:
+            return None
+
+        index = TranscriptIndex(timeline)
+        self._remember(transcript_id, index)
+        return index
+
+    def _remove_expired(self):
+        cutoff = time.time() - self.ttl_hours * 3600
+        for path in self.store_dir.glob("*.npz"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+            with self._lock:
+                self._indexes.pop(path.name.split(".")[0], None)
+
+    def _remember(self, transcript_id: str, index: TranscriptIndex):
+        with self._lock:
+            self._indexes[transcript_id] = index
+            self._indexes.move_to_end(transcript_id)
+            while len(self._indexes) > self.cache_size:
+                self._indexes.popitem(last=False)
+
+    def search(
+        self,
+        transcript_id: str,
+        query: str,
+        mode: str = "phrase",
+        start_ms: int = None,
+        end_ms: int = None,
+        context_words: int = 5,
+        limit: int = 100,
+    ) -> Optional[List[Dict]]:
+        """
+        Search a stored transcript.
+
+        Args:
+            transcript_id (str): Id returned by save()
+            query (str): Word, phrase or prefix to look for
+            mode (str): "word", "phrase" or "prefix"
+            start_ms (int): Only return hits starting at or after this time
+            end_ms (int): Only return hits starting before this time
+            context_words (int): Words of context on each side of a hit
+            limit (int): Maximum number of hits
+
+        Returns:
+            list: Hits with millisecond timestamps and context, or None if the
+            transcript does not exist
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if context_words < 0:
+            raise ValueError("context must not be negative")
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+
+        index = self.get_index(transcript_id)
+        if index is None:
+            return None
+        timeline = index.timeline
+
+        if mode == "prefix":
+            positions, length = index.prefix_positions(query), 1
+        elif mode == "word":
+            tokens = tokenize(query)
+            positions, length = index.positions(tokens[0] if tokens else ""), 1
+        else:
+            positions, length = index.phrase_positions(query), max(1, len(tokenize(query)))
+
+        # Restrict to the requested time range with a binary search on start times
+        first, last = index.timeline.index_range(
+            -np.inf if start_ms is None else start_ms / 1000,
+            np.inf if end_ms is None else end_ms / 1000,
+        )
+        positions = positions[(positions >= first) & (positions < last)][:limit]
+
+        hits = []
+        for position in positions.tolist():
+            hit_end = position + length
+            hits.append({
+                "text": timeline.text(position, hit_end),
+                "start_ms": int(round(timeline.start[position] * 1000)),
+                "end_ms": int(round(timeline.end[hit_end - 1] * 1000)),
+                "context": timeline.text(max(0, position - context_words), hit_end + context_words),
+            })
+        return hits
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Return the process-wide transcript store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptStore()
+        return _store
@@ -0,0 +1,117 @@
+import sys
+from typing import Dict, List, Pattern, Tuple
+
+import numpy as np
+
+
+class TranscriptTimeline:
+    """
+    Compact, columnar view of a word-level transcript.
+
+    Start and end times live in NumPy arrays and each word is stored once in
+    an interned vocabulary, with an int32 code per position. Converts to and
+    from the ``[{"word", "start", "end"}, ...]`` lists used elsewhere.
+    """
+
+    __slots__ = ("vocabulary", "codes", "start", "end")
+
+    def __init__(self, vocabulary: List[str], codes: np.ndarray, start: np.ndarray, end: np.ndarray):
+        self.vocabulary = vocabulary
+        self.codes = codes
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_words(cls, words: List[Dict]) -> "TranscriptTimeline":
+        """Build a timeline from a list of word dicts."""
+        vocabulary = []
+        lookup = {}
+        codes = np.empty(len(words), dtype=np.int32)
+        start = np.empty(len(words), dtype=np.float64)
+        end = np.empty(len(words), dtype=np.float64)
+
+        for i, word in enumerate(words):
+            text = word["word"]
+            code = lookup.get(text)
+            if code is None:
+                code = len(vocabulary)
+                text = sys.intern(text)
+                lookup[text] = code
+                vocabulary.append(text)
+            codes[i] = code
+            start[i] = word["start"]
+            end[i] = word["end"]
+
+        return cls(vocabulary, codes, start, end)
+
+    def to_words(self) -> List[Dict]:
+        """Convert back to the list-of-dicts representation."""
+        return [
+            {"word": self.vocabulary[code], "start": start, "end": end}
+            for code, start, end in zip(self.codes.tolist(), self.start.tolist(), self.end.tolist())
+        ]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def duration(self) -> float:
+        return float(self.end[-1]) if len(self) else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the arrays and vocabulary."""
+        return (
+            self.codes.nbytes + self.start.nbytes + self.end.nbytes
+            + sum(sys.getsizeof(word) for word in self.vocabulary)
+        )
+
+    def word(self, index: int) -> str:
+        return self.vocabulary[self.codes[index]]
+
+    def text(self, start_index: int = 0, end_index: int = None) -> str:
+        """Join the words in [start_index, end_index) with spaces."""
+        vocabulary = self.vocabulary
+        return " ".join(vocabulary[code] for code in self.codes[start_index:end_index].tolist())
+
+    def pause_boundaries(self, pause_threshold: float = 1.0) -> List[Tuple[int, int]]:
+        """Return [start, end) word index ranges separated by pauses longer than the threshold."""
+        if not len(self):
+            return []
+        gaps = self.start[1:] - self.end[:-1]
+        breaks = (np.flatnonzero(gaps > pause_threshold) + 1).tolist()
+        edges = [0] + breaks + [len(self)]
+        return list(zip(edges[:-1], edges[1:]))
+
+    def segments(self, pause_threshold: float = 1.0) -> List[Dict]:
+        """Pause-delimited segments as {"text", "start", "end"} dicts."""
+        return [
+            {
+                "text": self.text(first, last),
+                "start": float(self.start[first]),
+                "end": float(self.end[last - 1]),
+            }
+            for first, last in self.pause_boundaries(pause_threshold)
+        ]
+
+    def index_at(self, time: float) -> int:
+        """Index of the last word starting at or before time (-1 if none)."""
+        return int(np.searchsorted(self.start, time, side="right")) - 1
+
+    def index_range(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        """[first, last) indices of words starting within [start_time, end_time)."""
+        first = int(np.searchsorted(self.start, start_time, side="left"))
+        last = int(np.searchsorted(self.start, end_time, side="left"))
+        return first, last
+
+    def slice_time(self, start_time: float, end_time: float) -> "TranscriptTimeline":
+        """Words starting within [start_time, end_time), sharing this timeline's storage."""
+        first, last = self.index_range(start_time, end_time)
+        return TranscriptTimeline(
+            self.vocabulary, self.codes[first:last], self.start[first:last], self.end[first:last]
+        )
+
+    def match_words(self, regex: Pattern) -> np.ndarray:
+        """Indices of words matching regex; each distinct word is tested once."""
+        matching_codes = [code for code, word in enumerate(self.vocabulary) if regex.search(word)]
+        return np.flatnonzero(np.isin(self.codes, matching_codes))
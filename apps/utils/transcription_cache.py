@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv(
+    "TRANSCRIPTION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "readmeplease_transcripts")
+)
+CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", 200))
+CACHE_PCM_KEYS = os.getenv("TRANSCRIPTION_CACHE_PCM", "1") == "1"
+HASH_CHUNK_SIZE = 1024 * 1024
+# ffmpeg output options of the PCM stream behind pcm- keys. The first audio
+# track is mapped explicitly so every caller hashes the same track.
+PCM_OUTPUT_ARGS = ["-map", "0:a:0", "-ac", "1", "-ar", "16000", "-f", "s16le"]
+
+
+def hash_pcm_stream(stream) -> str:
+    """PCM cache fingerprint of a 16 kHz mono s16le stream (see PCM_OUTPUT_ARGS)."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return f"pcm-{digest.hexdigest()}"
+
+
+class TranscriptionCache:
+    """
+    Disk cache of word-timestamp transcriptions keyed by content hash.
+
+    Entries are JSON files whose modification time doubles as the LRU clock:
+    a hit touches the file and eviction removes the oldest files once the
+    cache holds more than max_entries.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = CACHE_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_fingerprint(path: str) -> str:
+        """Hash the uploaded bytes; cheap, but only matches byte-identical files."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return f"upload-{digest.hexdigest()}"
+
+    @staticmethod
+    def pcm_fingerprint(media_path: str) -> str:
+        """Hash the decoded 16 kHz mono PCM so re-muxed or re-encoded copies match."""
+        process = subprocess.Popen(
+            ["ffmpeg", "-v", "error", "-i", str(media_path), *PCM_OUTPUT_ARGS, "pipe:1"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        fingerprint = hash_pcm_stream(process.stdout)
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode audio from {media_path}")
+        return fingerprint
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Return cached words for key, or None on a miss."""
+        return self.get_any([key])[1]
+
+    def get_any(self, keys: Iterable[str]) -> Tuple[Optional[str], Optional[List[dict]]]:
+        """
+        Return (key, words) for the first cached key, or (None, None).
+
+        Keys are consumed lazily, so a generator can defer computing an
+        expensive key until the cheaper ones have missed. The whole lookup
+        counts as one hit or one miss.
+        """
+        for key in keys:
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    words = json.load(f)
+                os.utime(path)  # Mark as recently used
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+
+            with self._lock:
+                self.hits += 1
+            logger.info(f"Transcription cache hit for {key}")
+            return key, words
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def put(self, keys: Iterable[str], words: List[dict]):
+        """
+        Store words under every key (e.g. both the upload and PCM hash).
+
+        A failed write is logged and skipped; the cache never fails a
+        transcription that already succeeded.
+        """
+        payload = json.dumps(words, ensure_ascii=False)
+        for key in keys:
+            # Write a uniquely named file then rename, so concurrent writers
+            # of the same key never collide and readers never see a partial file
+            temp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False
+                ) as f:
+                    temp_path = f.name
+                    f.write(payload)
+                os.replace(temp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Could not write transcription cache entry {key}: {str(e)}")
+                if temp_path:
+                    try:
+                        os.unlink(temp_path)
+                    except OSError:
+                        pass
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # Evicted concurrently
+        entries = [path for _, path in sorted(entries)]
+        for path in entries[: max(0, len(entries) - self.max_entries)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(list(self.cache_dir.glob("*.json"))),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Return the process-wide transcription cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptionCache()
+        return _cache
@@ -0,0 +1,285 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "readmeplease_uploads"))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", 200))
+UPLOAD_TTL_HOURS = float(os.getenv("UPLOAD_TTL_HOURS", 24))
+CHUNK_SIZE = 1024 * 1024
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(Exception):
+    """Raised when an upload chunk is rejected."""
+
+
+def sniff_container(header: bytes) -> Optional[str]:
+    """Identify a video container from its first bytes, or None if unknown."""
+    if len(header) >= 8 and header[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide"):
+        return "mp4"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if header.startswith(b"RIFF") and header[8:11] == b"AVI":
+        return "avi"
+    if header.startswith(b"\x00\x00\x01\xba") or header.startswith(b"\x00\x00\x01\xb3"):
+        return "mpeg"
+    if header.startswith(b"FLV"):
+        return "flv"
+    if header.startswith(b"OggS"):
+        return "ogg"
+    return None
+
+
+class UploadStore:
+    """
+    Resumable uploads streamed straight to disk.
+
+    Each upload is a data file plus a small JSON metadata file. Chunks are
+    appended at the current offset while the size limit is enforced and a
+    SHA-256 of the content is updated incrementally, so the finished upload
+    already has the digest the transcription cache keys on.
+
+    Changes to an upload hold an exclusive flock on its data file, so
+    requests for the same upload are serialised across worker processes.
+    Each process keeps its running hash together with the offset it has
+    hashed up to, and rebuilds it from disk when another worker has
+    appended since.
+    """
+
+    def __init__(self, upload_dir: str = UPLOAD_DIR, max_bytes: int = MAX_UPLOAD_MB * 1024 * 1024):
+        self.upload_dir = Path(upload_dir)
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._hashers = {}
+        self._lock = threading.Lock()
+
+    def _meta_path(self, upload_id: str) -> Path:
+        if not _ID_PATTERN.match(upload_id or ""):
+            raise UploadError("Invalid upload id")
+        return self.upload_dir / f"{upload_id}.json"
+
+    def path(self, upload_id: str) -> Path:
+        """Path of the uploaded data file."""
+        return self._meta_path(upload_id).with_suffix(".upload")
+
+    @contextmanager
+    def _locked(self, upload_id: str):
+        """Hold the upload's file lock (across threads and worker processes)."""
+        try:
+            f = open(self.path(upload_id), "r+b")
+        except FileNotFoundError:
+            raise UploadError("Upload not found")
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_meta(self, upload_id: str, meta: dict):
+        temp_path = self._meta_path(upload_id).with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path(upload_id))
+
+    def status(self, upload_id: str) -> Optional[dict]:
+        """Return upload metadata, or None if the upload does not exist."""
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def create(self, filename: str, total_size: int = None) -> dict:
+        """Start a new upload."""
+        if total_size is not None and (
+            not isinstance(total_size, int) or isinstance(total_size, bool) or total_size < 0
+        ):
+            raise UploadError("size must be a non-negative integer")
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadError(f"Video file too large (max {self.max_bytes // (1024 * 1024)}MB)")
+
+        self._remove_expired()
+        upload_id = uuid.uuid4().hex
+        self.path(upload_id).touch()
+        meta = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_size": total_size,
+            "offset": 0,
+            "container": None,
+            "sha256": None,
+            "complete": False,
+            "created": time.time(),
+        }
+        self._write_meta(upload_id, meta)
+        with self._lock:
+            self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return meta
+
+    def append(self, upload_id: str, stream, offset: int) -> dict:
+        """
+        Stream a chunk from a file-like object onto the end of an upload.
+
+        Args:
+            upload_id (str): Id returned by create()
+            stream: File-like request body
+            offset (int): Byte offset the chunk starts at; must equal the
+                current upload size so retried chunks are not duplicated
+
+        Returns:
+            dict: Updated upload metadata
+        """
+        with self._locked(upload_id) as f:
+            meta = self.status(upload_id)
+            if meta is None:
+                raise UploadError("Upload not found")
+            if meta["complete"]:
+                raise UploadError("Upload already completed")
+            if offset != meta["offset"]:
+                raise UploadError(f"Offset mismatch: expected {meta['offset']}")
+
+            hasher = self._get_hasher(upload_id, meta["offset"])
+            size = meta["offset"]
+
+            f.seek(size)
+            try:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    if size == 0:
+                        meta["container"] = sniff_container(chunk[:16])
+                        if meta["container"] is None:
+                            raise UploadError("Unsupported file type; expected a video container")
+
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadError(
+                            f"Video file too large (max {self.max_bytes // (1024 * 1024)}MB)"
+                        )
+                    f.write(chunk)
+                    hasher.update(chunk)
+            except Exception:
+                # Roll back to the last acknowledged offset so the client can retry
+                f.truncate(meta["offset"])
+                self._forget(upload_id)
+                raise
+
+            f.flush()
+            meta["offset"] = size
+            self._write_meta(upload_id, meta)
+            with self._lock:
+                self._hashers[upload_id] = (hasher, size)
+            return meta
+
+    def complete(self, upload_id: str) -> dict:
+        """Finish an upload and record its content digest."""
+        with self._locked(upload_id):
+            meta = self.status(upload_id)
+            if meta is None:
+                raise UploadError("Upload not found")
+            if meta["complete"]:
+                return meta
+            if meta["offset"] == 0:
+                raise UploadError("Upload is empty")
+            if meta["total_size"] is not None and meta["offset"] != meta["total_size"]:
+                raise UploadError(f"Upload incomplete: {meta['offset']} of {meta['total_size']} bytes")
+
+            meta["sha256"] = self._get_hasher(upload_id, meta["offset"]).hexdigest()
+            meta["complete"] = True
+            self._write_meta(upload_id, meta)
+            self._forget(upload_id)
+            return meta
+
+    def claim(self, upload_id: str) -> dict:
+        """
+        Mark a completed upload as being processed and return its metadata.
+
+        An upload can be claimed once, so two requests never process (and
+        then remove) the same file.
+        """
+        with self._locked(upload_id):
+            meta = self.status(upload_id)
+            if meta is None or not meta["complete"]:
+                raise UploadError("Video upload not found or incomplete")
+            if meta.get("consumed"):
+                raise UploadError("Video upload has already been processed")
+            meta["consumed"] = True
+            self._write_meta(upload_id, meta)
+            return meta
+
+    def remove(self, upload_id: str):
+        """Delete an upload's data and metadata."""
+        self.path(upload_id).unlink(missing_ok=True)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        self._forget(upload_id)
+
+    def _forget(self, upload_id: str):
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+
+    def _get_hasher(self, upload_id: str, offset: int):
+        """
+        Return the running hash of the first offset bytes.
+
+        It is rebuilt from disk when this process lacks it or hashed up to a
+        different offset, e.g. because another worker took the last chunk.
+        """
+        with self._lock:
+            hasher, hashed_offset = self._hashers.get(upload_id, (None, None))
+        if hasher is not None and hashed_offset == offset:
+            return hasher
+
+        hasher = hashlib.sha256()
+        with open(self.path(upload_id), "rb") as f:
+            remaining = offset
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        with self._lock:
+            self._hashers[upload_id] = (hasher, offset)
+        return hasher
+
+    def _remove_expired(self):
+        cutoff = time.time() - UPLOAD_TTL_HOURS * 3600
+        for meta_path in self.upload_dir.glob("*.json"):
+            try:
+                if meta_path.stat().st_mtime < cutoff:
+                    self.remove(meta_path.stem)
+            except (OSError, UploadError):
+                continue
+
+        # Running hashes of uploads another worker finished or removed
+        with self._lock:
+            upload_ids = list(self._hashers)
+        for upload_id in upload_ids:
+            meta = self.status(upload_id)
+            if meta is None or meta["complete"]:
+                self._forget(upload_id)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Return the process-wide upload store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadStore()
+        return _store
@@ -0,0 +1,96 @@
+import logging
+import posixpath
+import re
+import time
+from typing import Dict, Iterable, Iterator, Tuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from .cloud_storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+IMAGE_LINK_PATTERN = re.compile(r'(!\[[^\]]*\]\()([^)\s]+)(\))')
+# Already-compressed formats gain nothing from deflate
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+IMAGE_DIR = "images"
+
+
+class ZipStreamBuffer:
+    """
+    Write-only, non-seekable sink for ZipFile.
+
+    ZipFile detects the missing seek()/tell() and writes data descriptors
+    after each entry instead of patching headers, so bytes can be handed
+    to the response as soon as they are written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        """Yield and forget everything written so far."""
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    Build a ZIP archive incrementally from (name, data) entries.
+
+    Each entry is compressed and yielded before the next one is produced,
+    so memory use is bounded by the largest single entry. JPEG/WebP/PNG
+    entries are stored; everything else is deflated.
+    """
+    buffer = ZipStreamBuffer()
+    with ZipFile(buffer, "w") as archive:
+        for name, data in entries:
+            info = ZipInfo(name, date_time=time.localtime()[:6])
+            extension = posixpath.splitext(name)[1].lower()
+            info.compress_type = ZIP_STORED if extension in STORED_EXTENSIONS else ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, data)
+            yield from buffer.drain()
+    yield from buffer.drain()
+
+
+def export_entries(markdown_content: str, storage: StorageBackend, readme_name: str = "README.md") -> Iterator[Tuple[str, bytes]]:
+    """
+    ZIP entries for a result: every stored image, then the markdown.
+
+    Images are read from the storage backend one at a time. The markdown
+    comes last so its links can be rewritten to the relative paths of the
+    images that were actually exported; links to images that could not be
+    read, or that other sites host, are left as they are.
+    """
+    exported: Dict[str, str] = {}
+    for match in IMAGE_LINK_PATTERN.finditer(markdown_content):
+        url = match.group(2)
+        if url in exported:
+            continue
+
+        file_key = storage.key_from_url(url)
+        if not file_key:
+            continue
+
+        try:
+            data = storage.read_image(file_key)
+        except Exception as e:
+            logger.error(f"Could not read {file_key} for export: {str(e)}")
+            continue
+
+        path = f"{IMAGE_DIR}/{posixpath.basename(file_key)}"
+        exported[url] = path
+        yield path, data
+
+    rewritten = IMAGE_LINK_PATTERN.sub(
+        lambda match: match.group(1) + exported.get(match.group(2), match.group(2)) + match.group(3),
+        markdown_content
+    )
+    yield readme_name, rewritten.encode("utf-8")